@@ -14,6 +14,13 @@ print_message () {
     echo -e "${left_filler_len// /$symbol}$message${right_filler_len// /$symbol}\033[0m"
 }
 
+run_project_tests () {
+    # Run pytest in the project directory (first argument) with the settings
+    # module (second argument). Pass --parallel to this script to test both
+    # projects at the same time.
+    (cd "$1" && DJANGO_SETTINGS_MODULE="$2" pytest --tb=line 1>&2)
+}
+
 
 if python -m flake8 --config=setup.cfg 1>&2;
 then
@@ -21,28 +28,39 @@ then
     echo $LF 1>&2
     if python structure_test.py
     then
-        cd ya_news
-        export DJANGO_SETTINGS_MODULE="${DJANGO_SETTINGS_MODULE:="yanews.settings"}"
-        if pytest --tb=line 1>&2;
-        then
-            cd ../ya_note
-            unset DJANGO_SETTINGS_MODULE
-            export DJANGO_SETTINGS_MODULE="${DJANGO_SETTINGS_MODULE:="yanote.settings"}"
-            if pytest --tb=line 1>&2;
-            then
-                exit 0
-            else
-                status=$?
-                print_message " При запуске упали ваши тесты для проекта YaNote. Проверьте тесты этого проекта " "=" 1
-                echo \`\`\` 1>&2
-                exit $status
-            fi
+        export DJANGO_SETTINGS_MODULE="${DJANGO_SETTINGS_MODULE:="yanews.settings_test"}"
+        if [[ "$1" == "--parallel" ]]; then
+            # Both projects are tested at once, the output is printed in order.
+            news_log=$(mktemp)
+            note_log=$(mktemp)
+            run_project_tests ya_news "$DJANGO_SETTINGS_MODULE" 2>"$news_log" &
+            news_pid=$!
+            run_project_tests ya_note yanote.settings_test 2>"$note_log" &
+            note_pid=$!
+            wait $news_pid
+            news_status=$?
+            wait $note_pid
+            note_status=$?
+            cat "$news_log" "$note_log" 1>&2
+            rm -f "$news_log" "$note_log"
         else
-            status=$?
+            run_project_tests ya_news "$DJANGO_SETTINGS_MODULE"
+            news_status=$?
+            if [[ $news_status -eq 0 ]]; then
+                run_project_tests ya_note yanote.settings_test
+                note_status=$?
+            fi
+        fi
+        if [[ $news_status -ne 0 ]]; then
             print_message " При запуске упали ваши тесты для проекта YaNews. Проверьте тесты этого проекта " "=" 1
             echo \`\`\` 1>&2
-            exit $status
+            exit $news_status
+        elif [[ $note_status -ne 0 ]]; then
+            print_message " При запуске упали ваши тесты для проекта YaNote. Проверьте тесты этого проекта " "=" 1
+            echo \`\`\` 1>&2
+            exit $note_status
         fi
+        exit 0
     else
         status=$?
         print_message " Убедитесь, что написанные вами тесты скопированы в указанные в ТЗ директории " "=" 1
@@ -0,0 +1,90 @@
+from time import monotonic, sleep, time_ns
+
+from django.conf import settings
+from django.core.cache import cache
+
+HOME_PAGE_GENERATION_KEY = 'news:home:generation'
+NEWS_REVISION_KEY = 'news:revision:{pk}'
+LOCK_POLL_INTERVAL = 0.05
+
+
+def _home_page_generation():
+    cache.add(HOME_PAGE_GENERATION_KEY, time_ns(), None)
+    return cache.get(HOME_PAGE_GENERATION_KEY)
+
+
+def home_page_key(generation):
+    """Ключ главной зависит от размера среза и поколения кэша."""
+    return (
+        f'news:home:{settings.NEWS_COUNT_ON_HOME_PAGE}:{generation}'
+    )
+
+
+def invalidate_home_page():
+    """
+    Сбрасывает кэш главной страницы.
+
+    Ключ не удаляется, а переходит в новое поколение: так страница,
+    которую воркер строил во время изменения, не попадёт в кэш.
+    """
+    try:
+        cache.incr(HOME_PAGE_GENERATION_KEY)
+    except ValueError:
+        cache.add(HOME_PAGE_GENERATION_KEY, time_ns(), None)
+
+
+def get_home_page(build):
+    """
+    Возвращает содержимое главной страницы из кэша.
+
+    При промахе страницу перестраивает только воркер, захвативший
+    блокировку; остальные ждут результат, пока блокировка не истечёт.
+    """
+    timeout = settings.NEWS_HOME_PAGE_CACHE_TIMEOUT
+    if not timeout:
+        return build()
+    key = home_page_key(_home_page_generation())
+    content = cache.get(key)
+    if content is not None:
+        return content
+    lock_key = f'{key}:lock'
+    lock_timeout = settings.NEWS_HOME_PAGE_LOCK_TIMEOUT
+    if cache.add(lock_key, True, lock_timeout):
+        try:
+            content = build()
+            cache.set(key, content, timeout)
+        finally:
+            cache.delete(lock_key)
+        return content
+    deadline = monotonic() + lock_timeout
+    while monotonic() < deadline:
+        sleep(LOCK_POLL_INTERVAL)
+        content = cache.get(key)
+        if content is not None:
+            return content
+    return build()
+
+
+def peek_home_page():
+    """Главная из кэша или None: ничего не строит и не ждёт блокировку."""
+    if not settings.NEWS_HOME_PAGE_CACHE_TIMEOUT:
+        return None
+    return cache.get(home_page_key(_home_page_generation()))
+
+
+def get_news_revision(pk):
+    """
+    Метка последнего изменения новости или её комментариев на месте.
+
+    Добавления и удаления комментариев видны по агрегатам в базе,
+    а правки текста — только по этой метке. Если метка вытеснена из
+    кэша, она начинается заново с текущего времени: страница лишь
+    перестроится лишний раз, но не устареет.
+    """
+    key = NEWS_REVISION_KEY.format(pk=pk)
+    cache.add(key, time_ns(), None)
+    return cache.get(key)
+
+
+def touch_news(pk):
+    cache.set(NEWS_REVISION_KEY.format(pk=pk), time_ns(), None)
@@ -0,0 +1,56 @@
+from django.db.models import (
+    Count, DateTimeField, F, OuterRef, Subquery, Value
+)
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Comment, News
+
+
+def published_comments():
+    return Comment.objects.filter(
+        news=OuterRef('pk'), status=Comment.Status.APPROVED
+    )
+
+
+def latest_comment_created():
+    return Subquery(
+        published_comments().order_by('-created').values('created')[:1]
+    )
+
+
+def add_comments(news_id, count, last_created):
+    """Учитывает новые опубликованные комментарии одним UPDATE."""
+    last_created = Value(last_created, output_field=DateTimeField())
+    News.objects.filter(pk=news_id).update(
+        comment_count=F('comment_count') + count,
+        last_comment_at=Greatest(
+            Coalesce('last_comment_at', last_created), last_created
+        ),
+    )
+
+
+def remove_comments(news_id, count):
+    """
+    Учитывает снятые с публикации комментарии.
+
+    Время последнего комментария пересчитывается подзапросом в том же
+    UPDATE: удалённый комментарий мог быть самым свежим.
+    """
+    News.objects.filter(pk=news_id).update(
+        comment_count=Greatest(F('comment_count') - count, 0),
+        last_comment_at=latest_comment_created(),
+    )
+
+
+def recount_comments(news=None):
+    """Пересчитывает счётчики заново для всех или выбранных новостей."""
+    if news is None:
+        news = News.objects.all()
+    comment_count = (
+        published_comments().order_by()
+        .values('news').annotate(count=Count('pk')).values('count')
+    )
+    return news.update(
+        comment_count=Coalesce(Subquery(comment_count), 0),
+        last_comment_at=latest_comment_created(),
+    )
@@ -0,0 +1,271 @@
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+from http import HTTPStatus
+from socketserver import ThreadingMixIn
+from statistics import quantiles
+from time import perf_counter, sleep
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand
+from django.core.wsgi import get_wsgi_application
+from django.urls import reverse
+
+from news.counters import add_comments
+from news.models import Comment, News
+from ._bench import test_database
+
+HOST = '127.0.0.1'
+BACKLOG = 2048
+STARTUP_TIMEOUT = 30
+
+# Сервер, модуль настроек процесса сервера и подпись в отчёте.
+MODES = (
+    ('wsgi', 'yanews.settings', 'WSGI, синхронные представления'),
+    ('asgi', 'yanews.settings', 'ASGI, синхронные представления'),
+    ('asgi', 'yanews.settings_asgi', 'ASGI, асинхронные представления'),
+)
+
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+    request_queue_size = BACKLOG
+
+
+class QuietHandler(WSGIRequestHandler):
+
+    def log_message(self, *args):
+        pass
+
+
+def serve_wsgi(port):
+    server = ThreadingWSGIServer((HOST, port), QuietHandler)
+    server.set_app(get_wsgi_application())
+    server.serve_forever()
+
+
+async def serve_asgi(port):
+    """
+    Минимальный HTTP/1.1-сервер для ASGI-приложения на asyncio.
+
+    Разбирает заголовки и тело по Content-Length и закрывает соединение
+    после ответа — для замера этого достаточно, а uvicorn и daphne
+    в зависимостях проекта нет.
+    """
+    application = get_asgi_application()
+
+    async def handle(reader, writer):
+        try:
+            head = await reader.readuntil(b'\r\n\r\n')
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+            return
+        request_line, *lines = head.decode('latin1').split('\r\n')[:-2]
+        method, target, _ = request_line.split(' ')
+        path, _, query = target.partition('?')
+        headers = [
+            (name.strip().lower().encode('latin1'),
+             value.strip().encode('latin1'))
+            for name, value in (line.split(':', 1) for line in lines)
+        ]
+        length = int(dict(headers).get(b'content-length', 0))
+        body = await reader.readexactly(length) if length else b''
+        messages = [{'type': 'http.request', 'body': body}]
+
+        async def receive():
+            if messages:
+                return messages.pop()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                status = message['status']
+                head = [f'HTTP/1.1 {status} {HTTPStatus(status).phrase}'] + [
+                    f'{name.decode("latin1")}: {value.decode("latin1")}'
+                    for name, value in message['headers']
+                ] + ['Connection: close']
+                writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin1'))
+            else:
+                writer.write(message.get('body', b''))
+                await writer.drain()
+
+        await application({
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': method,
+            'scheme': 'http',
+            'path': path,
+            'raw_path': path.encode('latin1'),
+            'query_string': query.encode('latin1'),
+            'root_path': '',
+            'headers': headers,
+            'client': writer.get_extra_info('peername'),
+            'server': (HOST, port),
+        }, receive, send)
+        writer.close()
+
+    server = await asyncio.start_server(handle, HOST, port, backlog=BACKLOG)
+    async with server:
+        await server.serve_forever()
+
+
+async def fetch(port, path):
+    """Код ответа или None, если сервер ответил не HTTP-строкой статуса."""
+    reader, writer = await asyncio.open_connection(HOST, port)
+    writer.write(
+        f'GET {path} HTTP/1.1\r\nHost: {HOST}\r\n'
+        'Connection: close\r\n\r\n'.encode()
+    )
+    response = await reader.read()
+    writer.close()
+    status = response.split(b' ', 2)[1:2]
+    if not status or not status[0].isdigit():
+        return None
+    return int(status[0])
+
+
+async def load(port, path, clients, requests):
+    """
+    Гоняет requests запросов от clients одновременных клиентов.
+
+    Возвращает запросы в секунду, медиану и 99-й перцентиль задержки
+    в миллисекундах и число ошибок или None, если ни один запрос
+    не удался.
+    """
+    remaining = requests
+    latencies = []
+    errors = 0
+
+    async def client():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            started = perf_counter()
+            try:
+                status = await fetch(port, path)
+            except OSError:
+                status = None
+            if status == HTTPStatus.OK:
+                latencies.append(perf_counter() - started)
+            else:
+                errors += 1
+
+    started = perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    elapsed = perf_counter() - started
+    if not latencies:
+        return None
+    # quantiles() до Python 3.13 требует хотя бы двух значений.
+    cuts = (
+        quantiles(latencies, n=100) if len(latencies) > 1
+        else latencies * 99
+    )
+    return len(latencies) / elapsed, cuts[49] * 1000, cuts[98] * 1000, errors
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(port, process):
+    deadline = perf_counter() + STARTUP_TIMEOUT
+    while perf_counter() < deadline and process.poll() is None:
+        try:
+            socket.create_connection((HOST, port)).close()
+            return
+        except OSError:
+            sleep(0.1)
+    raise RuntimeError('Сервер для замера не запустился.')
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность главной и страницы новости '
+        'под WSGI (потоковый wsgiref) и ASGI (сервер на asyncio) '
+        'с синхронными и асинхронными представлениями при 1000 '
+        'одновременных клиентов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=1000)
+        parser.add_argument('--requests', type=int, default=5000)
+        # Запуск сервера в дочернем процессе.
+        parser.add_argument('--serve', choices=('wsgi', 'asgi'))
+        parser.add_argument('--port', type=int)
+        parser.add_argument('--database')
+
+    def handle(self, *args, **options):
+        if options['serve']:
+            return self.serve(options)
+        with test_database():
+            news = self.populate()
+            pages = (
+                ('главная', reverse('news:home')),
+                ('новость', reverse('news:detail', args=[news.pk])),
+            )
+            for page, path in pages:
+                for server, settings_module, title in MODES:
+                    result = self.run(server, settings_module, path, options)
+                    if result is None:
+                        self.stdout.write(
+                            f'{page}, {title}: нет успешных запросов'
+                        )
+                        continue
+                    rps, median, p99, errors = result
+                    self.stdout.write(
+                        f'{page}, {title}: {rps:7.1f} запросов/с, '
+                        f'медиана {median:7.1f} мс, p99 {p99:7.1f} мс, '
+                        f'ошибок {errors}'
+                    )
+
+    def populate(self):
+        author = get_user_model().objects.create(username='bench')
+        News.objects.bulk_create(
+            News(title=f'Новость {index}', text='Текст новости. ' * 50)
+            for index in range(settings.NEWS_COUNT_ON_HOME_PAGE)
+        )
+        news = News.objects.first()
+        comments = Comment.objects.bulk_create(
+            Comment(news=news, author=author, text=f'Комментарий {index}',
+                    status=Comment.Status.APPROVED)
+            for index in range(settings.COMMENTS_COUNT_ON_DETAIL_PAGE)
+        )
+        # bulk_create не отправляет сигналы, счётчики обновляем сами.
+        add_comments(
+            news.pk, len(comments),
+            max(comment.created for comment in comments),
+        )
+        return news
+
+    def run(self, server, settings_module, path, options):
+        port = free_port()
+        process = subprocess.Popen(
+            [sys.executable, str(settings.BASE_DIR / 'manage.py'),
+             'bench_asgi', '--serve', server, '--port', str(port),
+             '--database', str(settings.DATABASES['default']['NAME'])],
+            env={**os.environ, 'DJANGO_SETTINGS_MODULE': settings_module},
+        )
+        try:
+            wait_for(port, process)
+            return asyncio.run(load(
+                port, path, options['clients'], options['requests']
+            ))
+        finally:
+            process.terminate()
+            process.wait()
+
+    def serve(self, options):
+        # Дочерний процесс работает с тестовой базой родителя.
+        settings.DATABASES['default']['NAME'] = options['database']
+        if options['serve'] == 'wsgi':
+            serve_wsgi(options['port'])
+        else:
+            asyncio.run(serve_asgi(options['port']))
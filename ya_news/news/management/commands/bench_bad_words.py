@@ -0,0 +1,52 @@
+import random
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+
+from news.profanity import WordMatcher
+from ._bench import measure
+
+ALPHABET = 'абвгдежзийклмнопрстуфхцчшщъыьэюя'
+WORD_COUNTS = (10, 1_000, 100_000)
+
+
+def random_word(rng):
+    return ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(5, 12)))
+
+
+def loop_search(words, text):
+    """Прежняя проверка из CommentForm.clean_text."""
+    lowered_text = text.lower()
+    for word in words:
+        if word in lowered_text:
+            return word
+    return None
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает проверку запрещённых слов циклом и скомпилированным '
+        'матчером на списках из 10, 1k и 100k слов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--text-length', type=int, default=2_000)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        # Текст без запрещённых слов — худший случай для обоих способов.
+        text = ('текст ' * options['text_length'])[:options['text_length']]
+        repeat = options['repeat']
+        for count in WORD_COUNTS:
+            words = [random_word(rng) + 'ъъ' for _ in range(count)]
+            started = perf_counter()
+            matcher = WordMatcher(words)
+            compile_time = perf_counter() - started
+            loop_rate = measure(lambda: loop_search(words, text), repeat)
+            matcher_rate = measure(lambda: matcher.search(text), repeat)
+            self.stdout.write(
+                f'{count:>7} words: loop {loop_rate:10.1f}/s, '
+                f'matcher {matcher_rate:10.1f}/s, '
+                f'compile {compile_time * 1000:8.1f} ms'
+            )
@@ -0,0 +1,71 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.test import Client
+from django.urls import reverse
+
+from news.models import Comment, News
+from ._bench import hammer, test_database
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагружает NewsComment параллельными писателями (и, по желанию, '
+        'читателями страницы новости) и выводит запросы в секунду '
+        'и ошибки «database is locked». Сравнение профилей: запуск '
+        'с --settings=yanews.settings_production.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=32)
+        parser.add_argument('--readers', type=int, default=0)
+        parser.add_argument('--requests', type=int, default=30,
+                            help='Запросов от каждого потока.')
+
+    def handle(self, *args, **options):
+        writers, readers = options['writers'], options['readers']
+        requests = options['requests']
+        # Ошибки блокировки считаются, трассировки в лог не нужны.
+        logging.getLogger('django.request').setLevel(logging.CRITICAL)
+        with test_database():
+            news = News.objects.create(title='Новость', text='Текст')
+            url = reverse('news:detail', args=[news.pk])
+            senders = []
+            for number in range(writers):
+                client = Client()
+                client.force_login(get_user_model().objects.create(
+                    username=f'writer{number}'
+                ))
+                senders.append(lambda number, client=client: client.post(
+                    url, {'text': f'Комментарий {number}'}
+                ))
+            senders += [
+                lambda number, client=Client(): client.get(url)
+                for _ in range(readers)
+            ]
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA journal_mode')
+                journal_mode = cursor.fetchone()[0]
+            connections.close_all()
+            started = perf_counter()
+            with ThreadPoolExecutor(len(senders)) as executor:
+                results = list(executor.map(
+                    hammer, senders, [requests] * len(senders)
+                ))
+            elapsed = perf_counter() - started
+            written = results[:writers]
+            read = results[writers:]
+            self.stdout.write(
+                f'journal_mode={journal_mode}, писателей {writers}, '
+                f'читателей {readers}: '
+                f'{sum(done for done, _ in written) / elapsed:7.1f} '
+                f'комментариев/с, '
+                f'{sum(done for done, _ in read) / elapsed:7.1f} чтений/с, '
+                f'ошибок блокировки '
+                f'{sum(locked for _, locked in results)}, '
+                f'сохранено {Comment.objects.filter(news=news).count()}'
+            )
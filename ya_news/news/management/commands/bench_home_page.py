@@ -0,0 +1,70 @@
+from tempfile import TemporaryDirectory
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from news.models import Comment, News
+from ._bench import measure, test_database
+
+COMMENTS_PER_NEWS = 50
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет запросы в секунду к главной странице с кэшем и без '
+        'на бэкендах locmem и filebased.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500)
+
+    def handle(self, *args, **options):
+        with test_database(), TemporaryDirectory() as cache_dir:
+            self.populate()
+            backends = {
+                'locmem': {
+                    'BACKEND': (
+                        'django.core.cache.backends.locmem.LocMemCache'
+                    ),
+                },
+                'filebased': {
+                    'BACKEND': (
+                        'django.core.cache.backends.filebased.'
+                        'FileBasedCache'
+                    ),
+                    'LOCATION': cache_dir,
+                },
+            }
+            for name, backend in backends.items():
+                for timeout in (0, settings.NEWS_HOME_PAGE_CACHE_TIMEOUT):
+                    rps = self.run(backend, timeout, options['requests'])
+                    state = 'on' if timeout else 'off'
+                    self.stdout.write(
+                        f'{name:<10} cache {state:<3} {rps:10.1f} req/s'
+                    )
+
+    def populate(self):
+        author = get_user_model().objects.create(username='bench')
+        News.objects.bulk_create(
+            News(title=f'Новость {index}', text='Текст новости. ' * 50)
+            for index in range(settings.NEWS_COUNT_ON_HOME_PAGE * 2)
+        )
+        Comment.objects.bulk_create(
+            Comment(news=item, author=author, text='Комментарий')
+            for item in News.objects.all()
+            for _ in range(COMMENTS_PER_NEWS)
+        )
+
+    def run(self, backend, timeout, requests):
+        with override_settings(
+            CACHES={'default': backend},
+            NEWS_HOME_PAGE_CACHE_TIMEOUT=timeout,
+        ):
+            cache.clear()
+            client = Client()
+            url = reverse('news:home')
+            return measure(lambda: client.get(url), requests)
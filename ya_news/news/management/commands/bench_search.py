@@ -0,0 +1,88 @@
+import random
+from itertools import islice
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from news.models import News
+from news.search import SearchResults, get_index
+from ._bench import test_database
+
+SYLLABLES = (
+    'ба', 'ве', 'го', 'ду', 'жи', 'за', 'ко', 'ли', 'ма', 'не', 'по', 'ру',
+    'са', 'те', 'фу', 'хо', 'ци', 'ча', 'ше', 'юр', 'ян', 'ст', 'кр', 'пл',
+)
+ENDINGS = ('', 'а', 'ы', 'ой', 'ами', 'ах', 'ов', 'е', 'ую')
+VOCABULARY_SIZE = 20_000
+WORDS_PER_STORY = 40
+BATCH_SIZE = 5_000
+PAGE_SIZE = 10
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает полнотекстовый поиск с icontains на сгенерированном '
+        'корпусе новостей.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--stories', type=int, default=1_000_000)
+        parser.add_argument('--queries', type=int, default=50)
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        vocabulary = [
+            ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+            for _ in range(VOCABULARY_SIZE)
+        ]
+        with test_database():
+            started = perf_counter()
+            self.populate(rng, vocabulary, options['stories'])
+            self.stdout.write(
+                f'Корпус: {options["stories"]} новостей за '
+                f'{perf_counter() - started:.1f} с'
+            )
+            queries = rng.sample(vocabulary, options['queries'])
+            for name, search in (
+                ('fts', self.search_index),
+                ('icontains', self.search_icontains),
+            ):
+                started = perf_counter()
+                for query in queries:
+                    search(query)
+                elapsed = (perf_counter() - started) / len(queries)
+                self.stdout.write(
+                    f'{name:<10} {elapsed * 1000:10.2f} мс на запрос'
+                )
+
+    def populate(self, rng, vocabulary, count):
+        def stories():
+            for pk in range(1, count + 1):
+                words = [
+                    rng.choice(vocabulary) + rng.choice(ENDINGS)
+                    for _ in range(WORDS_PER_STORY)
+                ]
+                yield News(
+                    pk=pk, title=' '.join(words[:5]).capitalize(),
+                    text=' '.join(words),
+                )
+
+        stories = stories()
+        batch = list(islice(stories, BATCH_SIZE))
+        while batch:
+            News.objects.bulk_create(batch)
+            get_index().index(batch)
+            batch = list(islice(stories, BATCH_SIZE))
+
+    @staticmethod
+    def search_index(query):
+        results = SearchResults(query)
+        return results.count(), results[:PAGE_SIZE]
+
+    @staticmethod
+    def search_icontains(query):
+        news = News.objects.filter(
+            Q(title__icontains=query) | Q(text__icontains=query)
+        )
+        return news.count(), list(news[:PAGE_SIZE])
@@ -0,0 +1,217 @@
+import csv
+import json
+import sqlite3
+import sys
+from contextlib import contextmanager
+from datetime import date
+from itertools import islice
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries, transaction
+from django.db.models import Max
+from django.utils.dateparse import parse_date
+
+from news.cache import invalidate_home_page, touch_news
+from news.models import News
+from news.search import index_queryset
+
+UPDATE_FIELDS = ('title', 'text', 'date')
+# Сырой INSERT не подставляет значения по умолчанию, поэтому счётчик
+# комментариев передаём явно, но при обновлении не трогаем.
+UPSERT_FIELDS = ('external_id', 'comment_count') + UPDATE_FIELDS
+# Держимся ниже старого лимита SQLite в 999 параметров на запрос.
+UPSERT_BATCH_SIZE = 999 // len(UPSERT_FIELDS)
+# bulk_update строит CASE по всем строкам пачки, его цена растёт
+# квадратично, поэтому обновления пишутся пачками поменьше.
+UPDATE_BATCH_SIZE = 100
+
+
+def read_jsonl(file):
+    for number, line in enumerate(file, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as error:
+            raise CommandError(f'Строка {number}: {error}')
+
+
+def read_csv(file):
+    yield from csv.DictReader(file)
+
+
+def batched(items, size):
+    items = iter(items)
+    batch = list(islice(items, size))
+    while batch:
+        yield batch
+        batch = list(islice(items, size))
+
+
+def build_news(row):
+    """Новость из строки фида или None, если строка неполная или битая."""
+    if not isinstance(row, dict):
+        return None
+    title = str(row.get('title') or '').strip()
+    text = str(row.get('text') or '').strip()
+    if not title or not text:
+        return None
+    news_date = row.get('date')
+    try:
+        news_date = (
+            parse_date(str(news_date)) if news_date else date.today()
+        )
+    except ValueError:
+        # Формат верный, но даты нет, например 2023-13-45.
+        return None
+    if news_date is None:
+        return None
+    external_id = str(row.get('external_id') or '').strip() or None
+    return News(
+        external_id=external_id,
+        title=title[:News._meta.get_field('title').max_length],
+        text=text,
+        date=news_date,
+    )
+
+
+def supports_upsert():
+    """INSERT ... ON CONFLICT DO UPDATE есть в PostgreSQL и SQLite 3.24+."""
+    return connection.vendor == 'postgresql' or (
+        connection.vendor == 'sqlite'
+        and sqlite3.sqlite_version_info >= (3, 24)
+    )
+
+
+def insert_on_conflict(items):
+    """Вставка с обновлением существующих строк одним запросом."""
+    quote = connection.ops.quote_name
+    fields = [News._meta.get_field(name) for name in UPSERT_FIELDS]
+    columns = ', '.join(quote(field.column) for field in fields)
+    row = '(' + ', '.join(['%s'] * len(fields)) + ')'
+    updates = ', '.join(
+        f'{quote(field.column)} = EXCLUDED.{quote(field.column)}'
+        for field in fields if field.name in UPDATE_FIELDS
+    )
+    with connection.cursor() as cursor:
+        for chunk in batched(items, UPSERT_BATCH_SIZE):
+            params = [
+                field.get_db_prep_save(
+                    getattr(item, field.attname), connection
+                )
+                for item in chunk for field in fields
+            ]
+            cursor.execute(
+                f'INSERT INTO {quote(News._meta.db_table)} ({columns}) '
+                f'VALUES {", ".join([row] * len(chunk))} '
+                f'ON CONFLICT ({quote("external_id")}) '
+                f'DO UPDATE SET {updates}',
+                params,
+            )
+
+
+def upsert_news(items):
+    """
+    Записывает пачку новостей, обновляя уже известные по external_id.
+
+    Повторы внутри пачки схлопываются: побеждает последняя строка.
+    Там, где база умеет INSERT ... ON CONFLICT, пачка пишется им,
+    иначе — через bulk_update и bulk_create.
+    Возвращает число созданных и обновлённых новостей.
+    """
+    by_external_id = {}
+    without_external_id = []
+    for item in items:
+        if item.external_id is None:
+            without_external_id.append(item)
+        else:
+            by_external_id[item.external_id] = item
+    with transaction.atomic():
+        existing = dict(
+            News.objects.filter(external_id__in=by_external_id)
+            .values_list('external_id', 'pk')
+        )
+        to_update, to_create = [], list(without_external_id)
+        for external_id, item in by_external_id.items():
+            if external_id in existing:
+                item.pk = existing[external_id]
+                to_update.append(item)
+            else:
+                to_create.append(item)
+        if supports_upsert():
+            insert_on_conflict(by_external_id.values())
+            News.objects.bulk_create(without_external_id)
+        else:
+            News.objects.bulk_update(
+                to_update, UPDATE_FIELDS, batch_size=UPDATE_BATCH_SIZE
+            )
+            News.objects.bulk_create(to_create)
+        # bulk-операции не отправляют сигналов, индексируем сами.
+        index_queryset(News.objects.filter(external_id__in=by_external_id))
+    for item in to_update:
+        touch_news(item.pk)
+    return len(to_create), len(to_update)
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково импортирует новости из JSON Lines или CSV. '
+        'Поля: external_id, title, text, date.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?', default='-',
+            help='Файл с новостями; «-» — читать из stdin.'
+        )
+        parser.add_argument('--format', choices=('jsonl', 'csv'))
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    @contextmanager
+    def open(self, path):
+        if path == '-':
+            yield sys.stdin
+            return
+        try:
+            file = open(path, encoding='utf-8', newline='')
+        except OSError as error:
+            raise CommandError(error)
+        with file:
+            yield file
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or (
+            'csv' if path.endswith('.csv') else 'jsonl'
+        )
+        reader = read_csv if file_format == 'csv' else read_jsonl
+        created = updated = skipped = 0
+        started = perf_counter()
+        last_pk = News.objects.aggregate(last_pk=Max('pk'))['last_pk'] or 0
+        with self.open(path) as file:
+            for rows in batched(reader(file), options['batch_size']):
+                items = [build_news(row) for row in rows]
+                batch = [item for item in items if item is not None]
+                skipped += len(items) - len(batch)
+                batch_created, batch_updated = upsert_news(batch)
+                created += batch_created
+                updated += batch_updated
+                # При DEBUG = True журнал запросов рос бы вместе с файлом.
+                reset_queries()
+                if options['verbosity'] > 1:
+                    self.stdout.write(
+                        f'Обработано строк: {created + updated + skipped}'
+                    )
+        index_queryset(
+            News.objects.filter(pk__gt=last_pk, external_id__isnull=True)
+        )
+        invalidate_home_page()
+        elapsed = perf_counter() - started
+        total = created + updated + skipped
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано: {created}, обновлено: {updated}, '
+            f'пропущено: {skipped}. '
+            f'{total} строк за {elapsed:.1f} с '
+            f'({total / elapsed if elapsed else total:.0f} строк/с)'
+        ))
@@ -0,0 +1,37 @@
+from concurrent.futures import ThreadPoolExecutor
+from time import sleep
+
+from django.core.management.base import BaseCommand
+
+from news.moderation import moderate_pending
+
+
+class Command(BaseCommand):
+    help = 'Проверяет комментарии, ожидающие модерации, и публикует их.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument(
+            '--interval', type=float, default=1.0,
+            help='Пауза между опросами очереди, когда она пуста.'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Разобрать очередь и завершиться.'
+        )
+
+    def handle(self, *args, **options):
+        with ThreadPoolExecutor(options['workers']) as executor:
+            while True:
+                approved, rejected = moderate_pending(
+                    executor, options['batch_size']
+                )
+                if approved or rejected:
+                    self.stdout.write(
+                        f'Одобрено: {approved}, отклонено: {rejected}'
+                    )
+                    continue
+                if options['once']:
+                    return
+                sleep(options['interval'])
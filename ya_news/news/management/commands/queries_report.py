@@ -0,0 +1,66 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from news import urls
+from news.models import Comment, News
+from ._bench import test_database
+
+# Запросы на запись идут после чтений: удаление уничтожает комментарий.
+WRITES = (
+    ('detail', {'text': 'Новый комментарий'}),
+    ('edit', {'text': 'Исправленный комментарий'}),
+    ('delete', {}),
+)
+
+
+class Command(BaseCommand):
+    help = 'Печатает число SQL-запросов для каждого адреса из news.urls.'
+
+    def handle(self, *args, **options):
+        with test_database():
+            user = get_user_model().objects.create(username='report')
+            news = News.objects.create(title='Новость', text='Текст')
+            comment = Comment.objects.create(
+                news=news, author=user, text='Комментарий'
+            )
+            kwargs = {
+                'detail': {'pk': news.pk},
+                'comments': {'pk': news.pk},
+                'edit': {'pk': comment.pk},
+                'delete': {'pk': comment.pk},
+            }
+            anonymous = Client()
+            authenticated = Client()
+            authenticated.force_login(user)
+            self.stdout.write(
+                f'{"URL":<24}{"метод":<7}{"аноним":>8}{"автор":>8}'
+            )
+            for pattern in urls.urlpatterns:
+                url = reverse(
+                    f'{urls.app_name}:{pattern.name}',
+                    kwargs=kwargs.get(pattern.name),
+                )
+                counts = [
+                    self.count_queries(client.get, url)
+                    for client in (anonymous, authenticated)
+                ]
+                self.write_row(url, 'GET', *counts)
+            for name, data in WRITES:
+                url = reverse(f'{urls.app_name}:{name}', kwargs=kwargs[name])
+                count = self.count_queries(authenticated.post, url, data)
+                self.write_row(url, 'POST', '-', count)
+
+    @staticmethod
+    def count_queries(method, *args):
+        with CaptureQueriesContext(connection) as context:
+            method(*args)
+        return len(context)
+
+    def write_row(self, url, method, anonymous, authenticated):
+        self.stdout.write(
+            f'{url:<24}{method:<7}{anonymous:>8}{authenticated:>8}'
+        )
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from news.models import News
+from news.search import get_index, index_queryset
+
+
+class Command(BaseCommand):
+    help = 'Заново индексирует все новости для полнотекстового поиска.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        get_index().clear()
+        index_queryset(News.objects.all(), options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Проиндексировано новостей: {News.objects.count()}'
+        ))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Max
+
+from news.counters import recount_comments
+from news.models import News
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает comment_count и last_comment_at у новостей '
+        'по опубликованным комментариям.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=10_000,
+            help='Сколько новостей пересчитывать одним UPDATE.'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_pk = News.objects.aggregate(last_pk=Max('pk'))['last_pk'] or 0
+        updated = 0
+        for start in range(0, last_pk, batch_size):
+            updated += recount_comments(News.objects.filter(
+                pk__gt=start, pk__lte=start + batch_size
+            ))
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано новостей: {updated}'
+        ))
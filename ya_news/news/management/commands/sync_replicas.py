@@ -0,0 +1,37 @@
+from time import sleep
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную базу SQLite в файлы реплик из DATABASE_REPLICAS: '
+        'локальная замена репликации. С --every повторяет копирование, '
+        'и реплики отстают от основной базы на заданное время.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--every', type=float, default=0,
+                            help='Интервал в секундах; 0 — один раз.')
+
+    def handle(self, *args, **options):
+        if not settings.DATABASE_REPLICAS:
+            self.stderr.write('DATABASE_REPLICAS пуст, копировать некуда.')
+            return
+        while True:
+            self.sync()
+            if not options['every']:
+                return
+            sleep(options['every'])
+
+    def sync(self):
+        primary = connections[DEFAULT_DB_ALIAS]
+        primary.ensure_connection()
+        for alias in settings.DATABASE_REPLICAS:
+            replica = connections[alias]
+            replica.ensure_connection()
+            # Онлайн-копия SQLite: основную базу можно не останавливать.
+            primary.connection.backup(replica.connection)
+            self.stdout.write(f'{alias}: скопирована основная база')
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.15 on 2026-10-18 02:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0003_comment_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='news',
+            name='external_id',
+            field=models.CharField(blank=True, max_length=100, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 3.2.15 on 2026-10-18 02:52
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_counters(apps, schema_editor):
+    News = apps.get_model('news', 'News')
+    Comment = apps.get_model('news', 'Comment')
+    published = Comment.objects.filter(
+        news=OuterRef('pk'), status='approved'
+    ).order_by()
+    News.objects.update(
+        comment_count=Coalesce(Subquery(
+            published.values('news').annotate(count=Count('pk'))
+            .values('count')
+        ), 0),
+        last_comment_at=Subquery(
+            published.order_by('-created').values('created')[:1]
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0004_news_external_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='news',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='news',
+            name='last_comment_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
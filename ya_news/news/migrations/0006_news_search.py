@@ -0,0 +1,57 @@
+import re
+
+import snowballstemmer
+from django.db import migrations
+
+# Копия news.search на момент миграции: его правки не должны менять
+# то, что делает уже выпущенная миграция.
+TABLE = 'news_search'
+WORD = re.compile(r'\w+')
+STEMMERS = {
+    language: snowballstemmer.stemmer(language)
+    for language in ('english', 'russian')
+}
+
+
+def tokenize(text):
+    words = WORD.findall(text.lower().replace('ё', 'е'))
+    return [
+        STEMMERS['english' if word.isascii() else 'russian'].stemWord(word)
+        for word in words
+    ]
+
+
+def create_search_table(apps, schema_editor):
+    """Таблица FTS5 нужна только в SQLite: прочие базы ищут в памяти."""
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    News = apps.get_model('news', 'News')
+    schema_editor.execute(
+        f'CREATE VIRTUAL TABLE {TABLE} USING fts5(title, text)'
+    )
+    with schema_editor.connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO {TABLE} (rowid, title, text) VALUES (%s, %s, %s)',
+            [
+                (pk, ' '.join(tokenize(title)), ' '.join(tokenize(text)))
+                for pk, title, text in News.objects.values_list(
+                    'pk', 'title', 'text'
+                ).iterator()
+            ],
+        )
+
+
+def drop_search_table(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE {TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0005_news_comment_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_table, drop_search_table),
+    ]
@@ -0,0 +1,123 @@
+import re
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.db import router, transaction
+from django.db.models import Q
+
+from .cache import invalidate_home_page, touch_news
+from .counters import add_comments
+from .forms import CommentForm
+from .models import Comment
+
+LINK = re.compile(r'https?://|www\.', re.IGNORECASE)
+REPEATED_CHAR = re.compile(r'(.)\1{9,}')
+SHOUTING_MIN_LETTERS = 20
+SHOUTING_SHARE = 0.7
+
+
+def check_form(text):
+    """Те же проверки, что и при отправке комментария."""
+    form = CommentForm({'text': text})
+    if not form.is_valid():
+        return '; '.join(form.errors['text'])
+    return None
+
+
+def check_links(text):
+    if len(LINK.findall(text)) > settings.NEWS_COMMENT_MAX_LINKS:
+        return 'Слишком много ссылок.'
+    return None
+
+
+def check_repeated_chars(text):
+    if REPEATED_CHAR.search(text):
+        return 'Слишком много повторов.'
+    return None
+
+
+def check_shouting(text):
+    letters = [char for char in text if char.isalpha()]
+    if len(letters) < SHOUTING_MIN_LETTERS:
+        return None
+    upper = sum(char.isupper() for char in letters)
+    if upper / len(letters) > SHOUTING_SHARE:
+        return 'Не пишите капслоком.'
+    return None
+
+
+RULES = (check_form, check_links, check_repeated_chars, check_shouting)
+
+
+def moderate(text):
+    """Возвращает причину отказа или None, если комментарий допустим."""
+    for rule in RULES:
+        reason = rule(text)
+        if reason:
+            return reason
+    return None
+
+
+def moderate_pending(executor, batch_size):
+    """
+    Проверяет одну пачку комментариев, ожидающих модерации.
+
+    Тексты проверяются в пуле потоков, а статусы и счётчики новостей
+    записываются в базу из вызывающего потока: SQLite не любит
+    параллельных писателей. Возвращает число одобренных и
+    отклонённых комментариев.
+    Очередь читается из базы для записи: отстающая реплика вернула бы
+    уже проверенные комментарии, и счётчики выросли бы дважды.
+    """
+    pending = list(
+        Comment.objects.using(router.db_for_write(Comment))
+        .filter(status=Comment.Status.PENDING)
+        .order_by('pk')
+        .values_list('pk', 'news_id', 'created', 'text')[:batch_size]
+    )
+    if not pending:
+        return 0, 0
+    verdicts = executor.map(moderate, [text for *_, text in pending])
+    approved, rejected = {}, []
+    for comment, reason in zip(pending, verdicts):
+        pk, news_id, created, text = comment
+        if reason:
+            rejected.append((pk, text))
+        else:
+            approved.setdefault(news_id, []).append((pk, text, created))
+    approved_count = 0
+    with transaction.atomic():
+        # Комментарий могли исправить или удалить, пока шла проверка:
+        # счётчики растут только на реально обновлённые строки.
+        for news_id, comments in approved.items():
+            count = set_status(
+                [(pk, text) for pk, text, _ in comments],
+                Comment.Status.APPROVED,
+            )
+            if count:
+                add_comments(
+                    news_id, count, max(created for *_, created in comments)
+                )
+            approved_count += count
+        rejected_count = set_status(rejected, Comment.Status.REJECTED)
+    # update() не отправляет сигналы, поэтому кэш сбрасываем сами.
+    for news_id in {news_id for _, news_id, *_ in pending}:
+        touch_news(news_id)
+    invalidate_home_page()
+    return approved_count, rejected_count
+
+
+def set_status(comments, status):
+    """
+    Меняет статус ещё ожидающих комментариев, возвращает их число.
+
+    comments — пары (pk, text). Комментарий, текст которого изменился
+    после проверки, остаётся в очереди и будет проверен заново.
+    """
+    if not comments:
+        return 0
+    checked = reduce(or_, (Q(pk=pk, text=text) for pk, text in comments))
+    return Comment.objects.filter(
+        checked, status=Comment.Status.PENDING,
+    ).update(status=status)
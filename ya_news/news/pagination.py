@@ -0,0 +1,61 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as DecodeError
+
+from django.conf import settings
+from django.db.models import Q
+from django.http import Http404
+from django.utils.dateparse import parse_datetime
+
+from .models import Comment
+
+CURSOR_SEPARATOR = '|'
+
+
+def encode_cursor(comment):
+    """Курсор указывает на последний показанный комментарий."""
+    value = f'{comment.created.isoformat()}{CURSOR_SEPARATOR}{comment.pk}'
+    return urlsafe_b64encode(value.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Возвращает пару (created, id) или 404 для испорченного курсора."""
+    try:
+        value = urlsafe_b64decode(cursor.encode()).decode()
+        created, pk = value.split(CURSOR_SEPARATOR)
+        created = parse_datetime(created)
+        pk = int(pk)
+    except (DecodeError, UnicodeError, ValueError):
+        raise Http404('Некорректный курсор.')
+    if created is None:
+        raise Http404('Некорректный курсор.')
+    return created, pk
+
+
+def get_comment_page(news, user, cursor=None, per_page=None):
+    """
+    Страница комментариев к новости по ключу (created, id).
+
+    Вместо OFFSET используется условие «после последнего показанного»,
+    поэтому глубокие страницы стоят столько же, сколько первая.
+    Показываются опубликованные комментарии и ожидающие модерации
+    комментарии самого пользователя.
+    Возвращает список комментариев и курсор следующей страницы.
+    """
+    if per_page is None:
+        per_page = settings.COMMENTS_COUNT_ON_DETAIL_PAGE
+    visible = Q(status=Comment.Status.APPROVED)
+    if user.is_authenticated:
+        visible |= Q(status=Comment.Status.PENDING, author=user)
+    comments = Comment.objects.filter(
+        visible, news=news
+    ).select_related('author')
+    if cursor:
+        created, pk = decode_cursor(cursor)
+        comments = comments.filter(
+            Q(created__gt=created) | Q(created=created, pk__gt=pk)
+        )
+    comments = list(comments.order_by('created', 'pk')[:per_page + 1])
+    if len(comments) <= per_page:
+        return comments, None
+    comments = comments[:per_page]
+    return comments, encode_cursor(comments[-1])
@@ -0,0 +1,146 @@
+import os
+import re
+from threading import Lock, Thread
+
+from django.conf import settings
+
+# Латинские буквы и цифры, похожие на кириллицу в обоих регистрах.
+LOOKALIKES = 'aeopcxyk036ё'
+CYRILLIC = 'аеорсхукозбе'
+HOMOGLYPHS = str.maketrans(LOOKALIKES, CYRILLIC)
+CHAR_VARIANTS = {}
+for lookalike, cyrillic in zip(LOOKALIKES, CYRILLIC):
+    CHAR_VARIANTS.setdefault(cyrillic, cyrillic)
+    CHAR_VARIANTS[cyrillic] += lookalike
+
+
+def normalize(text):
+    """Приводит слово к нижнему регистру и кириллическому написанию."""
+    return text.lower().translate(HOMOGLYPHS)
+
+
+def _char_pattern(char):
+    """Буква вместе со всеми похожими на неё."""
+    if char in CHAR_VARIANTS:
+        return f'[{CHAR_VARIANTS[char]}]'
+    return re.escape(char)
+
+
+def _trie_pattern(node):
+    """Превращает префиксное дерево слов в регулярное выражение."""
+    alternatives = [
+        _char_pattern(char) + _trie_pattern(child)
+        for char, child in sorted(node.items()) if char
+    ]
+    if not alternatives:
+        return ''
+    pattern = (
+        alternatives[0] if len(alternatives) == 1
+        else '(?:' + '|'.join(alternatives) + ')'
+    )
+    if '' in node:
+        return f'(?:{pattern})?'
+    return pattern
+
+
+class WordMatcher:
+    """
+    Ищет любое слово из списка за один проход по тексту.
+
+    Слова собираются в префиксное дерево, а оно — в одно регулярное
+    выражение, поэтому время поиска почти не зависит от длины списка.
+    Похожие латинские буквы учитываются в самом выражении, так что
+    текст достаточно привести к нижнему регистру.
+    """
+
+    def __init__(self, words, word_boundary=False):
+        trie = {}
+        for word in words:
+            word = normalize(word.strip())
+            if not word:
+                continue
+            node = trie
+            for char in word:
+                if '' in node and not word_boundary:
+                    # Более короткое слово уже найдётся в любом тексте,
+                    # где встречается это.
+                    break
+                node = node.setdefault(char, {})
+            else:
+                if not word_boundary:
+                    node.clear()
+                node[''] = {}
+        pattern = _trie_pattern(trie)
+        if word_boundary and pattern:
+            pattern = rf'(?<!\w)(?:{pattern})(?!\w)'
+        self.regex = re.compile(pattern) if pattern else None
+
+    def search(self, text):
+        """Возвращает найденный фрагмент текста или None."""
+        if self.regex is None:
+            return None
+        match = self.regex.search(text.lower())
+        return match.group() if match else None
+
+
+def read_words(path):
+    """Одно слово на строку; пустые строки и комментарии пропускаются."""
+    with open(path, encoding='utf-8') as file:
+        return [
+            line.strip() for line in file
+            if line.strip() and not line.lstrip().startswith('#')
+        ]
+
+
+class ReloadingWordMatcher:
+    """
+    Матчер, который перечитывает список слов при изменении файла.
+
+    Путь к файлу берётся из настройки BAD_WORDS_FILE; без неё или при
+    отсутствии файла используется встроенный список. Новый список
+    компилируется в фоновом потоке, а до его готовности проверка идёт
+    по прежнему.
+    """
+
+    def __init__(self, default_words):
+        self.default_words = tuple(default_words)
+        self._lock = Lock()
+        self._version = None
+        self._matcher = None
+
+    def _current_version(self):
+        path = settings.BAD_WORDS_FILE
+        try:
+            mtime = os.stat(path).st_mtime_ns if path else None
+        except OSError:
+            path = mtime = None
+        return path, mtime, settings.BAD_WORDS_WORD_BOUNDARY
+
+    def _build(self, version):
+        path, _, word_boundary = version
+        words = read_words(path) if path else self.default_words
+        self._matcher = WordMatcher(words, word_boundary)
+        self._version = version
+
+    def _build_and_release(self, version):
+        try:
+            self._build(version)
+        finally:
+            self._lock.release()
+
+    def get_matcher(self):
+        version = self._current_version()
+        if version == self._version:
+            return self._matcher
+        if self._matcher is None:
+            with self._lock:
+                if self._matcher is None:
+                    self._build(version)
+        elif self._lock.acquire(blocking=False):
+            Thread(
+                target=self._build_and_release, args=(version,), daemon=True
+            ).start()
+        return self._matcher
+
+    def search(self, text):
+        return self.get_matcher().search(text)
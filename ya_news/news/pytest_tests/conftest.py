@@ -1,4 +1,5 @@
 import pytest
+from django.core.cache import cache
 from django.test import Client
 from django.contrib.auth.models import User
 from django.utils.timezone import make_aware, datetime
@@ -6,15 +7,40 @@ from django.utils.timezone import make_aware, datetime
 from news.models import News, Comment
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
+
 @pytest.fixture
 def anonymous_client():
     return Client()
 
 
+USERNAME = 'testuser'
+
+
+@pytest.fixture(scope='session')
+def django_db_setup(django_db_setup, django_db_blocker):
+    """
+    Общий пользователь создаётся один раз на всю сессию тестов.
+
+    Каждый тест идёт в транзакции с откатом и пользователя не меняет.
+    Транзакционные тесты очищают базу — после них get_user создаёт
+    пользователя заново.
+    """
+    with django_db_blocker.unblock():
+        create_shared_user()
+
+
+def create_shared_user():
+    return User.objects.create_user(username=USERNAME, password='testpass')
+
+
 @pytest.fixture
-def get_user():
-    user = User.objects.create_user(username='testuser', password='testpass')
-    return user
+def get_user(db):
+    user = User.objects.filter(username=USERNAME).first()
+    return user or create_shared_user()
 
 
 @pytest.fixture
@@ -1,9 +1,14 @@
+from concurrent.futures import ThreadPoolExecutor
 from http import HTTPStatus
 
 import pytest
+from django.core.cache import cache
 from django.urls import reverse
 
+from news.cache import NEWS_REVISION_KEY
 from news.models import Comment, News
+from news.moderation import moderate_pending
+from news.search import PythonIndex, get_index, tokenize
 from yanews.settings import NEWS_COUNT_ON_HOME_PAGE
 
 HOME_URL = reverse('news:home')
@@ -85,3 +90,249 @@ def test_authenticated_user_can_see_comment_form(authenticated_client,
     response = authenticated_client.get(url)
     assert response.status_code == HTTPStatus.OK
     assert 'form' in response.context
+
+
+@pytest.mark.django_db
+def test_home_page_shows_comment_count(anonymous_client,
+                                       create_multiple_comments):
+    response = anonymous_client.get(HOME_URL)
+    assert response.status_code == HTTPStatus.OK
+    news = response.context['object_list'][0]
+    assert news.comment_count == len(create_multiple_comments)
+    assert f'Комментариев: {len(create_multiple_comments)}' in (
+        response.content.decode()
+    )
+
+
+@pytest.mark.django_db
+def test_home_page_does_not_load_comments(anonymous_client,
+                                          create_multiple_comments,
+                                          django_assert_num_queries):
+    with django_assert_num_queries(1) as context:
+        anonymous_client.get(HOME_URL)
+    for query in context.captured_queries:
+        assert '"news_comment"."text"' not in query['sql']
+
+
+@pytest.mark.django_db
+def test_detail_page_paginates_comments(anonymous_client, settings,
+                                        create_multiple_comments):
+    settings.COMMENTS_COUNT_ON_DETAIL_PAGE = 2
+    news_pk = create_multiple_comments[0].news.pk
+    url = reverse('news:detail', kwargs={'pk': news_pk})
+    response = anonymous_client.get(url)
+    assert response.context['comments'] == create_multiple_comments[:2]
+    next_cursor = response.context['next_cursor']
+    assert next_cursor is not None
+    response = anonymous_client.get(url, {'after': next_cursor})
+    assert response.context['comments'] == create_multiple_comments[2:]
+    assert response.context['next_cursor'] is None
+
+
+@pytest.mark.django_db
+def test_detail_page_rejects_broken_cursor(anonymous_client, news_post):
+    url = reverse('news:detail', kwargs={'pk': news_post.pk})
+    response = anonymous_client.get(url, {'after': 'broken'})
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_comments_fragment_returns_next_page(anonymous_client, settings,
+                                             create_multiple_comments):
+    settings.COMMENTS_COUNT_ON_DETAIL_PAGE = 2
+    news_pk = create_multiple_comments[0].news.pk
+    url = reverse('news:comments', kwargs={'pk': news_pk})
+    response = anonymous_client.get(url, {'format': 'json'})
+    assert response.status_code == HTTPStatus.OK
+    data = response.json()
+    assert [comment['id'] for comment in data['comments']] == [
+        comment.pk for comment in create_multiple_comments[:2]
+    ]
+    response = anonymous_client.get(url, {'after': data['next']})
+    assert response.status_code == HTTPStatus.OK
+    assert create_multiple_comments[2].text in response.content.decode()
+    assert response.context['next_cursor'] is None
+
+
+@pytest.mark.django_db
+def test_home_page_is_served_from_cache(anonymous_client, news_post,
+                                        django_assert_num_queries):
+    first_response = anonymous_client.get(HOME_URL)
+    with django_assert_num_queries(0):
+        response = anonymous_client.get(HOME_URL)
+    assert response.status_code == HTTPStatus.OK
+    assert response.content == first_response.content
+
+
+@pytest.mark.django_db
+def test_home_page_cache_is_reset_by_new_comment(anonymous_client,
+                                                 authenticated_client,
+                                                 news_post):
+    anonymous_client.get(HOME_URL)
+    url = reverse('news:detail', kwargs={'pk': news_post.pk})
+    authenticated_client.post(url, {'text': 'Test comment'})
+    with ThreadPoolExecutor(1) as executor:
+        moderate_pending(executor, batch_size=10)
+    response = anonymous_client.get(HOME_URL)
+    assert 'Комментариев: 1' in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_home_page_cache_is_reset_by_deleted_news(anonymous_client,
+                                                  news_post):
+    anonymous_client.get(HOME_URL)
+    news_post.delete()
+    response = anonymous_client.get(HOME_URL)
+    assert news_post.title not in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_home_page_cache_can_be_disabled(anonymous_client, news_post,
+                                         settings,
+                                         django_assert_num_queries):
+    settings.NEWS_HOME_PAGE_CACHE_TIMEOUT = 0
+    anonymous_client.get(HOME_URL)
+    with django_assert_num_queries(1):
+        anonymous_client.get(HOME_URL)
+
+
+def detail_etag(client, news_post):
+    url = reverse('news:detail', kwargs={'pk': news_post.pk})
+    return client.get(url)['ETag']
+
+
+@pytest.mark.django_db
+def test_unchanged_detail_page_is_not_rendered(anonymous_client, news_post,
+                                               django_assert_num_queries):
+    url = reverse('news:detail', kwargs={'pk': news_post.pk})
+    etag = anonymous_client.get(url)['ETag']
+    with django_assert_num_queries(1):
+        response = anonymous_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+
+@pytest.mark.django_db
+def test_detail_etag_changes_with_comments(anonymous_client, news_post,
+                                           create_comments):
+    etag = detail_etag(anonymous_client, news_post)
+    create_comments.text = 'Edited comment'
+    create_comments.save()
+    edited_etag = detail_etag(anonymous_client, news_post)
+    assert edited_etag != etag
+    create_comments.delete()
+    assert detail_etag(anonymous_client, news_post) != edited_etag
+
+
+@pytest.mark.django_db
+def test_detail_etag_depends_on_user(anonymous_client, authenticated_client,
+                                     news_post):
+    assert (
+        detail_etag(anonymous_client, news_post)
+        != detail_etag(authenticated_client, news_post)
+    )
+    url = reverse('news:detail', kwargs={'pk': news_post.pk})
+    response = authenticated_client.get(url)
+    assert 'private' in response['Cache-Control']
+
+
+@pytest.fixture
+def old_news(create_comments):
+    """Новость и комментарий, не менявшиеся с прошлого года."""
+    News.objects.filter(pk=create_comments.news_id).update(date='2023-02-01')
+    Comment.objects.filter(pk=create_comments.pk).update(
+        created='2023-02-10 00:00:00+00:00'
+    )
+    cache.set(NEWS_REVISION_KEY.format(pk=create_comments.news_id), 0, None)
+    return create_comments
+
+
+@pytest.mark.django_db
+def test_deleted_comment_is_not_modified_since(anonymous_client, old_news):
+    url = reverse('news:detail', kwargs={'pk': old_news.news_id})
+    last_modified = anonymous_client.get(url)['Last-Modified']
+    old_news.delete()
+    response = anonymous_client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+    assert response.status_code == HTTPStatus.OK
+    assert old_news.text not in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_login_ignores_anonymous_last_modified(anonymous_client, get_user,
+                                               old_news):
+    url = reverse('news:detail', kwargs={'pk': old_news.news_id})
+    last_modified = anonymous_client.get(url)['Last-Modified']
+    anonymous_client.force_login(get_user)
+    response = anonymous_client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+    assert response.status_code == HTTPStatus.OK
+    assert 'form' in response.context
+    assert 'Last-Modified' not in response
+
+
+SEARCH_URL = reverse('news:search')
+
+
+def search(client, query, **params):
+    response = client.get(SEARCH_URL, {'q': query, **params})
+    assert response.status_code == HTTPStatus.OK
+    return response
+
+
+@pytest.mark.django_db
+def test_search_finds_other_word_forms(anonymous_client):
+    news = News.objects.create(title='Погода', text='Свежие новости о погоде')
+    News.objects.create(title='Спорт', text='Матч отменили')
+    response = search(anonymous_client, 'новость')
+    assert list(response.context['object_list']) == [news]
+
+
+@pytest.mark.django_db
+def test_search_ranks_title_matches_first(anonymous_client):
+    in_text = News.objects.create(title='Итоги', text='Выборы прошли тихо')
+    in_title = News.objects.create(title='Выборы', text='Итоги дня')
+    response = search(anonymous_client, 'выборы')
+    assert list(response.context['object_list']) == [in_title, in_text]
+
+
+@pytest.mark.django_db
+def test_search_is_paginated(anonymous_client, settings):
+    settings.NEWS_SEARCH_PAGE_SIZE = 2
+    for index in range(3):
+        News.objects.create(title=f'Новость {index}', text='Текст')
+    response = search(anonymous_client, 'текст')
+    assert len(response.context['object_list']) == 2
+    assert response.context['paginator'].count == 3
+    response = search(anonymous_client, 'текст', page=2)
+    assert len(response.context['object_list']) == 1
+
+
+@pytest.mark.django_db
+def test_search_index_follows_changes(anonymous_client, news_post):
+    news_post.title = 'Редкое слово'
+    news_post.save()
+    response = search(anonymous_client, 'редкое')
+    assert list(response.context['object_list']) == [news_post]
+    news_post.delete()
+    response = search(anonymous_client, 'редкое')
+    assert list(response.context['object_list']) == []
+
+
+@pytest.mark.django_db
+def test_python_index_matches_sqlite_index():
+    for title, text in (
+        ('Выборы', 'Итоги дня'),
+        ('Итоги', 'Выборы прошли тихо'),
+        ('Спорт', 'Матч отменили'),
+    ):
+        News.objects.create(title=title, text=text)
+    terms = tokenize('выборы итоги')
+    assert PythonIndex().search(terms, 0, 10) == (
+        get_index().search(terms, 0, 10)
+    )
+
+
+@pytest.mark.django_db
+def test_python_index_handles_empty_corpus():
+    index = PythonIndex()
+    terms = tokenize('выборы')
+    assert index.count(terms) == 0
+    assert index.search(terms, 0, 10) == []
@@ -1,10 +1,33 @@
+import json
+import os
+from importlib import reload
+from concurrent.futures import ThreadPoolExecutor
 from http import HTTPStatus
+from io import StringIO
+from time import monotonic, sleep
 
 import pytest
-from django.urls import reverse
+from asgiref.sync import async_to_sync
+from django.core.management import call_command
+from django.contrib.auth import SESSION_KEY
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connection
+from django.http import HttpResponse
+from django.test import AsyncClient, Client
+from django.urls import clear_url_caches, reverse
 from django.contrib.auth.models import User
 
-from news.models import Comment
+from news.forms import BAD_WORDS, WARNING
+import news.urls
+import yanews.urls
+from news.models import Comment, News
+from news.moderation import moderate_pending
+from news.profanity import ReloadingWordMatcher, WordMatcher
+from yanews.routers import (
+    PIN_COOKIE, PrimaryReplicaRouter, ReplicaPinMiddleware, use_primary
+)
+from yanews.sessions import SessionStore
 
 
 @pytest.mark.django_db
@@ -78,3 +101,436 @@ def test_authenticated_user_cannot_delete_others_comment(authenticated_client,
     url = reverse('news:delete', kwargs={'pk': create_comments.pk})
     response = authenticated_client.post(url)
     assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('comment_text', (
+    'Ты редиска!',
+    'Ты PEДИСКА!',
+    'Какой нeгoдяй',
+))
+def test_comment_with_bad_words_is_rejected(authenticated_client, news_post,
+                                            comment_text):
+    url = reverse('news:detail', kwargs={'pk': news_post.pk})
+    response = authenticated_client.post(url, {'text': comment_text})
+    assert response.status_code == HTTPStatus.OK
+    assert response.context['form'].errors['text'] == [WARNING]
+    assert not Comment.objects.exists()
+
+
+@pytest.mark.django_db
+def test_rejected_comment_keeps_comment_list(authenticated_client,
+                                             create_comments):
+    url = reverse('news:detail', kwargs={'pk': create_comments.news.pk})
+    response = authenticated_client.post(url, {'text': 'Ты редиска!'})
+    assert response.context['form'].errors['text'] == [WARNING]
+    assert response.context['comments'] == [create_comments]
+    assert create_comments.text in response.content.decode()
+
+
+def test_word_matcher_respects_word_boundary():
+    matcher = WordMatcher(BAD_WORDS, word_boundary=True)
+    assert matcher.search('редиска') == 'редиска'
+    assert matcher.search('редиская') is None
+    assert WordMatcher(BAD_WORDS).search('редиская') == 'редиска'
+
+
+def test_bad_words_are_reloaded_from_file(settings, tmp_path):
+    words_file = tmp_path / 'bad_words.txt'
+    words_file.write_text('# Список слов\nморковка\n', encoding='utf-8')
+    settings.BAD_WORDS_FILE = str(words_file)
+    matcher = ReloadingWordMatcher(BAD_WORDS)
+    assert matcher.search('Ты морковка')
+    assert not matcher.search('Ты редиска')
+    words_file.write_text('капуста\n', encoding='utf-8')
+    os.utime(words_file, ns=(0, 0))
+    deadline = monotonic() + 5
+    while not matcher.search('Ты капуста') and monotonic() < deadline:
+        sleep(0.01)
+    assert matcher.search('Ты капуста')
+    assert not matcher.search('Ты морковка')
+
+
+def moderate_all():
+    with ThreadPoolExecutor(2) as executor:
+        return moderate_pending(executor, batch_size=100)
+
+
+@pytest.mark.django_db
+def test_new_comment_waits_for_moderation(authenticated_client,
+                                          anonymous_client, news_post):
+    url = reverse('news:detail', kwargs={'pk': news_post.pk})
+    authenticated_client.post(url, {'text': 'Test comment'})
+    comment = Comment.objects.get()
+    assert comment.status == Comment.Status.PENDING
+    response = authenticated_client.get(url)
+    assert response.context['comments'] == [comment]
+    assert 'на модерации' in response.content.decode()
+    assert anonymous_client.get(url).context['comments'] == []
+    assert moderate_all() == (1, 0)
+    assert anonymous_client.get(url).context['comments'] == [comment]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('comment_text', (
+    'Смотрите http://a.example http://b.example http://c.example',
+    'Ураааааааааааааа',
+    'ПОЧЕМУ НИКТО НЕ ОТВЕЧАЕТ НА МОЙ ВОПРОС',
+))
+def test_moderation_rejects_comments(news_post, get_user, comment_text):
+    comment = Comment.objects.create(
+        news=news_post, author=get_user, text=comment_text,
+        status=Comment.Status.PENDING,
+    )
+    assert moderate_all() == (0, 1)
+    comment.refresh_from_db()
+    assert comment.status == Comment.Status.REJECTED
+
+
+@pytest.mark.django_db
+def test_moderation_rechecks_bad_words(news_post, get_user):
+    Comment.objects.create(
+        news=news_post, author=get_user, text='Ты редиска',
+        status=Comment.Status.PENDING,
+    )
+    assert moderate_all() == (0, 1)
+
+
+@pytest.mark.django_db
+def test_edited_comment_goes_back_to_moderation(authenticated_client,
+                                                create_comments):
+    news = create_comments.news
+    news.refresh_from_db()
+    assert news.comment_count == 1
+    url = reverse('news:edit', kwargs={'pk': create_comments.pk})
+    links = ' '.join(f'http://{index}.example' for index in range(4))
+    authenticated_client.post(url, {'text': f'BUY NOW {links}'})
+    create_comments.refresh_from_db()
+    assert create_comments.status == Comment.Status.PENDING
+    news.refresh_from_db()
+    assert news.comment_count == 0
+    assert moderate_all() == (0, 1)
+
+
+class RacingExecutor:
+    """Пока идёт проверка, комментарии успевает обработать другой воркер."""
+
+    def map(self, func, texts):
+        verdicts = [func(text) for text in texts]
+        Comment.objects.update(status=Comment.Status.APPROVED)
+        return verdicts
+
+
+@pytest.mark.django_db
+def test_moderation_counts_only_updated_comments(news_post, get_user):
+    Comment.objects.create(
+        news=news_post, author=get_user, text='Текст',
+        status=Comment.Status.PENDING,
+    )
+    assert moderate_pending(RacingExecutor(), batch_size=10) == (0, 0)
+    news_post.refresh_from_db()
+    assert news_post.comment_count == 0
+
+
+class EditingExecutor:
+    """Пока идёт проверка, автор дописывает в комментарий ссылки."""
+
+    def map(self, func, texts):
+        verdicts = [func(text) for text in texts]
+        Comment.objects.update(text='http://a http://b http://c http://d')
+        return verdicts
+
+
+@pytest.mark.django_db
+def test_moderation_keeps_comment_edited_during_check(news_post, get_user):
+    comment = Comment.objects.create(
+        news=news_post, author=get_user, text='Текст',
+        status=Comment.Status.PENDING,
+    )
+    assert moderate_pending(EditingExecutor(), batch_size=10) == (0, 0)
+    comment.refresh_from_db()
+    assert comment.status == Comment.Status.PENDING
+    news_post.refresh_from_db()
+    assert news_post.comment_count == 0
+    with ThreadPoolExecutor() as executor:
+        assert moderate_pending(executor, batch_size=10) == (0, 1)
+
+
+@pytest.mark.django_db
+def test_import_news_upserts_by_external_id(tmp_path):
+    feed = tmp_path / 'feed.jsonl'
+    rows = [
+        {'external_id': 'a', 'title': 'Первая', 'text': 'Текст'},
+        {'external_id': 'b', 'title': 'Вторая', 'text': 'Текст'},
+        {'external_id': 'a', 'title': 'Первая, исправленная', 'text': 'Т'},
+        {'title': 'Без текста'},
+        {'external_id': 'x', 'title': 'Т', 'text': 'Т', 'date': '2023-13-45'},
+        ['не', 'объект'],
+        {'external_id': 'd', 'title': 'После битых строк', 'text': 'Текст'},
+    ]
+    feed.write_text('\n'.join(json.dumps(row) for row in rows))
+    out = StringIO()
+    call_command('import_news', str(feed), batch_size=2, stdout=out)
+    assert 'пропущено: 3' in out.getvalue()
+    assert News.objects.count() == 3
+    assert News.objects.get(external_id='a').title == 'Первая, исправленная'
+    news = tmp_path / 'news.csv'
+    news.write_text(
+        'external_id,title,text,date\n'
+        'b,Вторая новая,Текст,2023-01-01\n'
+        'c,Третья,Текст,2023-01-02\n'
+    )
+    call_command('import_news', str(news), stdout=StringIO())
+    assert News.objects.count() == 4
+    assert News.objects.get(external_id='b').title == 'Вторая новая'
+
+
+@pytest.mark.django_db
+def test_comment_counters_follow_comment_lifecycle(authenticated_client,
+                                                   news_post, settings):
+    settings.NEWS_COMMENT_MODERATION = False
+    url = reverse('news:detail', kwargs={'pk': news_post.pk})
+    authenticated_client.post(url, {'text': 'Первый'})
+    authenticated_client.post(url, {'text': 'Второй'})
+    first, second = Comment.objects.order_by('pk')
+    news_post.refresh_from_db()
+    assert news_post.comment_count == 2
+    assert news_post.last_comment_at == second.created
+    delete_url = reverse('news:delete', kwargs={'pk': second.pk})
+    authenticated_client.post(delete_url)
+    news_post.refresh_from_db()
+    assert news_post.comment_count == 1
+    assert news_post.last_comment_at == first.created
+
+
+@pytest.mark.django_db
+def test_comment_counters_follow_status_changes(news_post, get_user):
+    comment = Comment.objects.create(
+        news=news_post, author=get_user, text='Текст',
+        status=Comment.Status.PENDING,
+    )
+    news_post.refresh_from_db()
+    assert news_post.comment_count == 0
+    moderate_all()
+    news_post.refresh_from_db()
+    assert news_post.comment_count == 1
+    comment = Comment.objects.get(pk=comment.pk)
+    comment.status = Comment.Status.REJECTED
+    comment.save()
+    news_post.refresh_from_db()
+    assert news_post.comment_count == 0
+    assert news_post.last_comment_at is None
+
+
+@pytest.mark.django_db
+def test_deleting_news_skips_comment_counters(create_multiple_comments,
+                                              django_assert_num_queries):
+    news = create_multiple_comments[0].news
+    # Выборка и удаление комментариев, удаление новости и её строки
+    # в поисковом индексе (в точке сохранения); счётчики не трогаем.
+    with django_assert_num_queries(6):
+        news.delete()
+    assert not Comment.objects.exists()
+
+
+@pytest.mark.django_db
+def test_recount_comments_repairs_counters(create_multiple_comments):
+    news = create_multiple_comments[0].news
+    News.objects.update(comment_count=100, last_comment_at=None)
+    call_command('recount_comments', batch_size=1, stdout=StringIO())
+    news.refresh_from_db()
+    assert news.comment_count == len(create_multiple_comments)
+    assert news.last_comment_at == create_multiple_comments[-1].created
+
+
+# В settings_test реплик нет, а под settings_replicas чтения вне
+# транзакции идут на replica1 и replica2 — тест должен их разрешать.
+@pytest.mark.django_db(transaction=True, databases='__all__')
+def test_comment_counters_survive_concurrent_posts(news_post, settings):
+    settings.NEWS_COMMENT_MODERATION = False
+    url = reverse('news:detail', kwargs={'pk': news_post.pk})
+    users = [
+        User.objects.create(username=f'user{index}') for index in range(4)
+    ]
+
+    def post_comments(user):
+        client = Client()
+        client.force_login(user)
+        for index in range(5):
+            client.post(url, {'text': f'Комментарий {index}'})
+        connection.close()
+
+    with ThreadPoolExecutor(len(users)) as executor:
+        list(executor.map(post_comments, users))
+    news_post.refresh_from_db()
+    assert news_post.comment_count == Comment.objects.count() == 20
+
+
+# Сессия и пользователь — два запроса на любой авторизованный запрос.
+AUTH_QUERIES = 2
+
+
+@pytest.mark.django_db
+def test_post_comment_query_count(authenticated_client, news_post,
+                                  django_assert_num_queries):
+    url = reverse('news:detail', kwargs={'pk': news_post.pk})
+    # Новость и вставка комментария.
+    with django_assert_num_queries(AUTH_QUERIES + 2):
+        response = authenticated_client.post(url, {'text': 'Комментарий'})
+    assert response.status_code == HTTPStatus.FOUND
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('url_name, method, data, queries', (
+    ('news:edit', 'get', None, 1),
+    # Правка снимает комментарий с публикации до модерации.
+    ('news:edit', 'post', {'text': 'Новый текст'}, 3),
+    ('news:delete', 'get', None, 1),
+    # Удаление опубликованного комментария обновляет счётчик новости.
+    ('news:delete', 'post', None, 3),
+))
+def test_comment_write_paths_query_count(authenticated_client,
+                                         create_comments,
+                                         django_assert_num_queries,
+                                         url_name, method, data, queries):
+    url = reverse(url_name, kwargs={'pk': create_comments.pk})
+    with django_assert_num_queries(AUTH_QUERIES + queries):
+        response = getattr(authenticated_client, method)(url, data)
+    assert response.status_code in (HTTPStatus.OK, HTTPStatus.FOUND)
+
+
+@pytest.mark.django_db
+def test_new_connections_get_sqlite_pragmas(settings):
+    settings.SQLITE_PRAGMAS = {'cache_size': -1234, 'busy_timeout': 4321}
+    new_connection = connection.copy()
+    try:
+        with new_connection.cursor() as cursor:
+            cursor.execute('PRAGMA cache_size')
+            assert cursor.fetchone()[0] == -1234
+            cursor.execute('PRAGMA busy_timeout')
+            assert cursor.fetchone()[0] == 4321
+    finally:
+        new_connection.close()
+
+
+def test_router_reads_from_replicas_unless_pinned(settings):
+    settings.DATABASE_REPLICAS = ['replica']
+    router = PrimaryReplicaRouter()
+    assert router.db_for_read(News) == 'replica'
+    assert router.db_for_write(News) == DEFAULT_DB_ALIAS
+    with use_primary():
+        assert router.db_for_read(News) == DEFAULT_DB_ALIAS
+
+
+def test_reads_stay_on_primary_after_write(settings, rf):
+    settings.DATABASE_REPLICAS = ['replica']
+    read_from = []
+
+    def view(request):
+        read_from.append(PrimaryReplicaRouter().db_for_read(News))
+        return HttpResponse()
+
+    middleware = ReplicaPinMiddleware(view)
+    response = middleware(rf.post('/'))
+    assert read_from == [DEFAULT_DB_ALIAS]
+    assert (response.cookies[PIN_COOKIE]['max-age']
+            == settings.DATABASE_REPLICA_PIN_SECONDS)
+    middleware(rf.get('/'))
+    assert read_from[-1] == 'replica'
+    pinned = rf.get('/')
+    pinned.COOKIES[PIN_COOKIE] = response.cookies[PIN_COOKIE].value
+    middleware(pinned)
+    assert read_from[-1] == DEFAULT_DB_ALIAS
+
+
+def reload_urls():
+    reload(news.urls)
+    reload(yanews.urls)
+    clear_url_caches()
+
+
+@pytest.fixture
+def async_views(settings):
+    settings.NEWS_ASYNC_VIEWS = True
+    reload_urls()
+    yield
+    settings.NEWS_ASYNC_VIEWS = False
+    reload_urls()
+
+
+@async_to_sync
+async def async_get(client, *args, **kwargs):
+    return await client.get(*args, **kwargs)
+
+
+@pytest.mark.django_db
+def test_async_views_serve_pages(async_views, create_comments, get_user,
+                                 django_assert_num_queries):
+    # Обращение к базе из цикла событий падает с SynchronousOnlyOperation.
+    client = AsyncClient()
+    news = create_comments.news
+    home_url = reverse('news:home')
+    detail_url = reverse('news:detail', kwargs={'pk': news.pk})
+    response = async_get(client, home_url)
+    assert news.title in response.content.decode()
+    with django_assert_num_queries(0):
+        cached = async_get(client, home_url)
+    assert cached.content == response.content
+    response = async_get(client, detail_url)
+    assert create_comments.text in response.content.decode()
+    response = async_get(
+        client, detail_url, **{'If-None-Match': response['ETag']}
+    )
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    client.force_login(get_user)
+    response = async_get(client, detail_url)
+    assert 'form' in response.context
+    # AsyncClient в Django 3.2 не читает тело формы, форму шлёт Client:
+    # асинхронное представление он вызывает через async_to_sync.
+    sync_client = Client()
+    sync_client.force_login(get_user)
+    response = sync_client.post(detail_url, {'text': 'Из ASGI'})
+    assert response.status_code == HTTPStatus.FOUND
+    assert Comment.objects.filter(text='Из ASGI', author=get_user).exists()
+
+
+@pytest.fixture
+def cached_sessions(settings):
+    settings.SESSION_ENGINE = 'yanews.sessions'
+    settings.AUTHENTICATION_BACKENDS = ['yanews.auth.CachedModelBackend']
+
+
+@pytest.mark.django_db
+def test_cached_sessions_skip_auth_queries(cached_sessions, create_comments,
+                                           get_user,
+                                           django_assert_num_queries):
+    client = Client()
+    client.force_login(get_user)
+    url = reverse('news:detail', kwargs={'pk': create_comments.news.pk})
+    client.get(url)
+    # Метка для ETag, новость и комментарии; сессия и пользователь в кэше.
+    with django_assert_num_queries(3):
+        response = client.get(url)
+    assert response.context['user'] == get_user
+    get_user.set_password('newpass')
+    get_user.save()
+    response = client.get(url)
+    assert not response.context['user'].is_authenticated
+
+
+@pytest.mark.django_db
+def test_cached_sessions_write_behind(cached_sessions, get_user):
+    session = SessionStore()
+    session['visits'] = 1
+    session.save()
+    session['visits'] = 2
+    session.save()
+    stored = Session.objects.get(pk=session.session_key)
+    assert stored.get_decoded() == {'visits': 1}
+    assert SessionStore(session.session_key)['visits'] == 2
+    session[SESSION_KEY] = str(get_user.pk)
+    session.save()
+    stored = Session.objects.get(pk=session.session_key)
+    assert stored.get_decoded()[SESSION_KEY] == str(get_user.pk)
+    cache.clear()
+    assert SessionStore(session.session_key)[SESSION_KEY] == str(get_user.pk)
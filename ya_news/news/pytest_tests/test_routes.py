@@ -5,6 +5,7 @@ from django.urls import reverse
 from django.contrib.auth.models import User
 
 HOME_URL = 'news:home'
+SEARCH_URL = 'news:search'
 NEWS_DETAIL_URL = 'news:detail'
 COMMENT_DELETE_URL = 'news:delete'
 COMMENT_EDIT_URL = 'news:edit'
@@ -17,6 +18,10 @@ def home_url():
     return reverse(HOME_URL)
 
 
+def search_url():
+    return reverse(SEARCH_URL)
+
+
 def news_detail_url(news_post):
     return reverse(NEWS_DETAIL_URL, kwargs={'pk': news_post.pk})
 
@@ -48,6 +53,13 @@ def test_home_page_anonymous(anonymous_client):
     assert response.status_code == HTTPStatus.OK
 
 
+@pytest.mark.django_db
+def test_search_page_anonymous(anonymous_client):
+    url = search_url()
+    response = anonymous_client.get(url, {'q': 'новости'})
+    assert response.status_code == HTTPStatus.OK
+
+
 @pytest.mark.django_db
 def test_news_detail_page_anonymous(anonymous_client, news_post):
     url = news_detail_url(news_post)
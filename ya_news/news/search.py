@@ -0,0 +1,258 @@
+import re
+from functools import lru_cache
+from itertools import islice
+from math import log
+from threading import Lock, local
+from time import time_ns
+
+import snowballstemmer
+from django.core.cache import cache
+from django.db import connection, transaction
+
+from .models import News
+
+TABLE = 'news_search'
+WORD = re.compile(r'\w+')
+# Совпадение в заголовке весит больше совпадения в тексте.
+TITLE_WEIGHT = 10
+GENERATION_KEY = 'news:search:generation'
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_stemmers = local()
+
+
+def _stemmer(language):
+    if not hasattr(_stemmers, language):
+        setattr(_stemmers, language, snowballstemmer.stemmer(language))
+    return getattr(_stemmers, language)
+
+
+@lru_cache(maxsize=100_000)
+def stem(word):
+    """Основа слова: русский стеммер для кириллицы, английский — для ASCII."""
+    return _stemmer('english' if word.isascii() else 'russian').stemWord(
+        word
+    )
+
+
+def tokenize(text):
+    words = WORD.findall(text.lower().replace('ё', 'е'))
+    return [stem(word) for word in words]
+
+
+class SQLiteIndex:
+    """
+    Индекс в виртуальной таблице FTS5.
+
+    В таблицу пишутся уже выделенные основы слов, поэтому поиск по
+    «новостям» находит и «новость». Строки связаны с новостями через
+    rowid, синхронизацию выполняют сигналы и импорт.
+    """
+
+    def index(self, news):
+        rows = [
+            (item.pk, ' '.join(tokenize(item.title)),
+             ' '.join(tokenize(item.text)))
+            for item in news
+        ]
+        # Без транзакции каждая строка executemany коммитится отдельно.
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(
+                f'DELETE FROM {TABLE} WHERE rowid = %s',
+                [(pk,) for pk, _, _ in rows],
+            )
+            cursor.executemany(
+                f'INSERT INTO {TABLE} (rowid, title, text) '
+                'VALUES (%s, %s, %s)',
+                rows,
+            )
+
+    def remove(self, pks):
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(
+                f'DELETE FROM {TABLE} WHERE rowid = %s',
+                [(pk,) for pk in pks],
+            )
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {TABLE}')
+
+    @staticmethod
+    def _match(terms):
+        return ' '.join(f'"{term}"' for term in terms)
+
+    def count(self, terms):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT count(*) FROM {TABLE} WHERE {TABLE} MATCH %s',
+                [self._match(terms)],
+            )
+            return cursor.fetchone()[0]
+
+    def search(self, terms, offset, limit):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s '
+                f'ORDER BY bm25({TABLE}, {TITLE_WEIGHT}, 1) '
+                'LIMIT %s OFFSET %s',
+                [self._match(terms), limit, offset],
+            )
+            return [pk for pk, in cursor.fetchall()]
+
+
+class PythonIndex:
+    """
+    Инвертированный индекс в памяти процесса для баз без FTS5.
+
+    Индекс строится из базы при первом поиске. Изменения увеличивают
+    поколение в кэше: процесс, сделавший изменение, правит свой индекс
+    на месте, остальные перестраивают индекс при следующем поиске.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._generation = None
+        self.postings = {}
+        self.lengths = {}
+        self.terms = {}
+
+    def _add(self, pk, title, text):
+        frequencies = {}
+        for term in tokenize(title):
+            frequencies[term] = frequencies.get(term, 0) + TITLE_WEIGHT
+        for term in tokenize(text):
+            frequencies[term] = frequencies.get(term, 0) + 1
+        for term, frequency in frequencies.items():
+            self.postings.setdefault(term, {})[pk] = frequency
+        self.lengths[pk] = sum(frequencies.values())
+        self.terms[pk] = tuple(frequencies)
+
+    def _discard(self, pk):
+        self.lengths.pop(pk, None)
+        for term in self.terms.pop(pk, ()):
+            self.postings[term].pop(pk, None)
+
+    def _ensure_fresh(self):
+        cache.add(GENERATION_KEY, time_ns(), None)
+        generation = cache.get(GENERATION_KEY)
+        if generation == self._generation:
+            return
+        self.postings, self.lengths, self.terms = {}, {}, {}
+        for pk, title, text in (
+            News.objects.values_list('pk', 'title', 'text').iterator()
+        ):
+            self._add(pk, title, text)
+        self._generation = generation
+
+    def _bump(self, update):
+        with self._lock:
+            try:
+                generation = cache.incr(GENERATION_KEY)
+            except ValueError:
+                return
+            if self._generation is not None and (
+                generation == self._generation + 1
+            ):
+                update()
+                self._generation = generation
+
+    def index(self, news):
+        news = [(item.pk, item.title, item.text) for item in news]
+
+        def update():
+            for pk, title, text in news:
+                self._discard(pk)
+                self._add(pk, title, text)
+
+        self._bump(update)
+
+    def remove(self, pks):
+        def update():
+            for pk in pks:
+                self._discard(pk)
+
+        self._bump(update)
+
+    def clear(self):
+        """Индекс строится из базы: достаточно пометить его устаревшим."""
+        with self._lock:
+            self._generation = None
+
+    def _matches(self, terms):
+        with self._lock:
+            self._ensure_fresh()
+            postings = [self.postings.get(term, {}) for term in terms]
+            # Пустой корпус: средней длины документа нет.
+            if not postings or not self.lengths:
+                return {}
+            found = set.intersection(*(set(item) for item in postings))
+            average = sum(self.lengths.values()) / len(self.lengths)
+            scores = dict.fromkeys(found, 0.0)
+            for term_postings in postings:
+                idf = log(1 + (len(self.lengths) - len(term_postings) + 0.5)
+                          / (len(term_postings) + 0.5))
+                for pk in found:
+                    frequency = term_postings[pk]
+                    norm = 1 - BM25_B + BM25_B * self.lengths[pk] / average
+                    scores[pk] += idf * frequency * (BM25_K1 + 1) / (
+                        frequency + BM25_K1 * norm
+                    )
+            return scores
+
+    def count(self, terms):
+        return len(self._matches(terms))
+
+    def search(self, terms, offset, limit):
+        scores = self._matches(terms)
+        ranked = sorted(scores, key=lambda pk: (-scores[pk], -pk))
+        return ranked[offset:offset + limit]
+
+
+sqlite_index = SQLiteIndex()
+python_index = PythonIndex()
+
+
+def get_index():
+    return sqlite_index if connection.vendor == 'sqlite' else python_index
+
+
+def index_queryset(news, batch_size=1000):
+    """Индексирует новости пачками, не держа в памяти весь запрос."""
+    news = news.only('pk', 'title', 'text').iterator(chunk_size=batch_size)
+    batch = list(islice(news, batch_size))
+    while batch:
+        get_index().index(batch)
+        batch = list(islice(news, batch_size))
+
+
+class SearchResults:
+    """
+    Ленивый результат поиска, который понимает Paginator.
+
+    Считает совпадения и загружает только новости нужной страницы.
+    """
+
+    def __init__(self, query):
+        self.terms = list(dict.fromkeys(tokenize(query)))
+        self._count = None
+
+    def count(self):
+        if self._count is None:
+            self._count = get_index().count(self.terms) if self.terms else 0
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key:key + 1][0]
+        if not self.terms:
+            return []
+        offset = key.start or 0
+        limit = (key.stop if key.stop is not None else self.count()) - offset
+        pks = get_index().search(self.terms, offset, limit)
+        news = News.objects.in_bulk(pks)
+        return [news[pk] for pk in pks if pk in news]
@@ -0,0 +1,116 @@
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from yanews.auth import forget_user
+from .cache import invalidate_home_page, touch_news
+from .counters import add_comments, remove_comments
+from .models import Comment, News
+from .search import get_index
+
+
+@receiver(post_save, sender=News)
+@receiver(post_delete, sender=News)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def reset_home_page(sender, **kwargs):
+    """Любое изменение новостей и комментариев сбрасывает главную."""
+    invalidate_home_page()
+
+
+@receiver(post_save, sender=News)
+def touch_saved_news(sender, instance, **kwargs):
+    touch_news(instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+def touch_edited_comment(sender, instance, created, **kwargs):
+    """Правка комментария не меняет агрегаты, поэтому ставим метку."""
+    if not created:
+        touch_news(instance.news_id)
+
+
+@receiver(post_delete, sender=Comment)
+def touch_deleted_comment(sender, instance, **kwargs):
+    """Удаление может сдвинуть дату назад: Last-Modified берёт метку."""
+    touch_news(instance.news_id)
+
+
+@receiver(post_save, sender=Comment)
+def count_saved_comment(sender, instance, created, raw, **kwargs):
+    """
+    Обновляет счётчики новости при публикации и снятии комментария.
+
+    Срабатывает и для NewsComment, и для правок в админке, где статус
+    меняется во встроенной форме комментария.
+    """
+    if raw:
+        return
+    was_published = (
+        not created
+        and getattr(instance, '_loaded_status', None)
+        == Comment.Status.APPROVED
+    )
+    is_published = instance.status == Comment.Status.APPROVED
+    if is_published and not was_published:
+        add_comments(instance.news_id, 1, instance.created)
+    elif was_published and not is_published:
+        remove_comments(instance.news_id, 1)
+    instance._loaded_status = instance.status
+
+
+# Новости, которые удаляются вместе со своими комментариями.
+_deleting_news = ContextVar('deleting_news', default=frozenset())
+
+
+@receiver(pre_delete, sender=News)
+def mark_deleting_news(sender, instance, **kwargs):
+    """
+    Каскад шлёт post_delete на каждый комментарий удаляемой новости.
+
+    Пересчитывать счётчики строки, которую сейчас удалят, незачем.
+    """
+    _deleting_news.set(_deleting_news.get() | {instance.pk})
+
+
+@receiver(post_delete, sender=News)
+def unmark_deleted_news(sender, instance, **kwargs):
+    _deleting_news.set(_deleting_news.get() - {instance.pk})
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    if (instance.status == Comment.Status.APPROVED
+            and instance.news_id not in _deleting_news.get()):
+        remove_comments(instance.news_id, 1)
+
+
+@receiver(post_save, sender=News)
+def index_news(sender, instance, **kwargs):
+    get_index().index([instance])
+
+
+@receiver(post_delete, sender=News)
+def unindex_news(sender, instance, **kwargs):
+    get_index().remove([instance.pk])
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def reset_cached_user(sender, instance, **kwargs):
+    """Сбрасывает пользователя в кэше сессий, см. yanews/auth.py."""
+    forget_user(instance.pk)
+
+
+@receiver(connection_created)
+def tune_sqlite(sender, connection, **kwargs):
+    """Применяет SQLITE_PRAGMAS к каждому новому соединению с SQLite."""
+    if connection.vendor != 'sqlite' or not settings.SQLITE_PRAGMAS:
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
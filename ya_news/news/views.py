@@ -1,11 +1,35 @@
+from datetime import datetime, time
+from hashlib import md5
+
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.shortcuts import get_object_or_404
+from django.db.models import Count, Max
+from django.http import (
+    Http404, HttpResponse, HttpResponseNotAllowed, JsonResponse
+)
+from django.shortcuts import get_object_or_404, render
 from django.urls import reverse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
 from django.views import generic
 
+from .cache import get_home_page, get_news_revision, peek_home_page
 from .forms import CommentForm
 from .models import Comment, News
+from .pagination import get_comment_page
+from .search import SearchResults
+
+
+def latest_news():
+    """
+    Выводим только несколько последних новостей.
+
+    Их количество определяется в настройках проекта.
+    Число комментариев хранится в самой новости.
+    """
+    return News.objects.all()[:settings.NEWS_COUNT_ON_HOME_PAGE]
 
 
 class NewsList(generic.ListView):
@@ -14,26 +38,56 @@ class NewsList(generic.ListView):
     template_name = 'news/home.html'
 
     def get_queryset(self):
-        """
-        Выводим только несколько последних новостей.
+        return latest_news()
 
-        Их количество определяется в настройках проекта.
-        """
-        return self.model.objects.prefetch_related(
-            'comment_set'
-        )[:settings.NEWS_COUNT_ON_HOME_PAGE]
+    def get(self, request, *args, **kwargs):
+        """Анонимным пользователям отдаём страницу из кэша."""
+        if request.user.is_authenticated:
+            return super().get(request, *args, **kwargs)
+
+        def build():
+            return super(NewsList, self).get(
+                request, *args, **kwargs
+            ).render().content
 
+        return HttpResponse(get_home_page(build))
 
-class NewsDetail(generic.DetailView):
+
+class NewsSearch(generic.ListView):
+    """Полнотекстовый поиск по заголовкам и текстам новостей."""
+    template_name = 'news/search.html'
+
+    def get_queryset(self):
+        return SearchResults(self.request.GET.get('q', ''))
+
+    def get_paginate_by(self, queryset):
+        return settings.NEWS_SEARCH_PAGE_SIZE
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.request.GET.get('q', '')
+        return context
+
+
+class CommentPageMixin:
+    """Страница комментариев новости self.object в контексте шаблона."""
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        comments, next_cursor = get_comment_page(
+            self.object, self.request.user, self.request.GET.get('after')
+        )
+        context['comments'] = comments
+        context['next_cursor'] = next_cursor
+        return context
+
+
+class NewsDetail(CommentPageMixin, generic.DetailView):
     model = News
     template_name = 'news/detail.html'
 
     def get_object(self, queryset=None):
-        obj = get_object_or_404(
-            self.model.objects.prefetch_related('comment_set__author'),
-            pk=self.kwargs['pk']
-        )
-        return obj
+        return get_object_or_404(self.model, pk=self.kwargs['pk'])
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -44,6 +98,7 @@ class NewsDetail(generic.DetailView):
 
 class NewsComment(
         LoginRequiredMixin,
+        CommentPageMixin,
         generic.detail.SingleObjectMixin,
         generic.FormView
 ):
@@ -59,38 +114,131 @@ class NewsComment(
         comment = form.save(commit=False)
         comment.news = self.object
         comment.author = self.request.user
+        if settings.NEWS_COMMENT_MODERATION:
+            comment.status = Comment.Status.PENDING
         comment.save()
         return super().form_valid(form)
 
     def get_success_url(self):
-        post = self.get_object()
-        return reverse('news:detail', kwargs={'pk': post.pk}) + '#comments'
+        return reverse(
+            'news:detail', kwargs={'pk': self.object.pk}
+        ) + '#comments'
 
 
 class NewsDetailView(generic.View):
 
     def get(self, request, *args, **kwargs):
-        view = NewsDetail.as_view()
-        return view(request, *args, **kwargs)
+        """Не перестраиваем страницу, если у клиента актуальная версия."""
+        etag, last_modified = self.get_validators(request, kwargs['pk'])
+        if request.user.is_authenticated:
+            # Страница своя у каждого пользователя, а дата правки общая:
+            # по одному If-Modified-Since вошедший получил бы страницу,
+            # сохранённую до входа. Различает версии только ETag.
+            last_modified = None
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            view = NewsDetail.as_view()
+            response = view(request, *args, **kwargs)
+        response.headers.setdefault('ETag', etag)
+        if last_modified is not None:
+            response.headers.setdefault(
+                'Last-Modified', http_date(last_modified)
+            )
+        patch_cache_control(response, no_cache=True)
+        if request.user.is_authenticated:
+            patch_cache_control(response, private=True)
+        return response
+
+    @staticmethod
+    def get_validators(request, pk):
+        """
+        Валидаторы ETag и Last-Modified одним агрегирующим запросом.
+
+        В ETag входят состояние комментариев, метка правок, параметры
+        страницы и пользователь с его CSRF-секретом: ссылки на правку
+        и форма комментария у каждого свои.
+        """
+        state = News.objects.filter(pk=pk).aggregate(
+            date=Max('date'),
+            last_comment=Max('comment__created'),
+            last_comment_id=Max('comment__id'),
+            comment_count=Count('comment'),
+        )
+        if state['date'] is None:
+            raise Http404('Новость не найдена.')
+        revision = get_news_revision(pk)
+        user = request.user
+        csrf_secret = (
+            request.META.get('CSRF_COOKIE', '')
+            if user.is_authenticated else ''
+        )
+        etag = md5(repr((
+            state['date'],
+            state['last_comment_id'],
+            state['comment_count'],
+            revision,
+            request.GET.urlencode(),
+            user.pk,
+            csrf_secret,
+        )).encode()).hexdigest()
+        last_modified = max(filter(None, (
+            timezone.make_aware(datetime.combine(state['date'], time.min)),
+            state['last_comment'],
+            datetime.fromtimestamp(revision / 1e9, timezone.utc),
+        )))
+        return quote_etag(etag), int(last_modified.timestamp())
 
     def post(self, request, *args, **kwargs):
         view = NewsComment.as_view()
         return view(request, *args, **kwargs)
 
 
+class NewsComments(generic.View):
+    """Следующая страница комментариев: HTML-фрагмент или JSON."""
+    template_name = 'news/includes/comments.html'
+
+    def get(self, request, *args, **kwargs):
+        news = get_object_or_404(News, pk=kwargs['pk'])
+        comments, next_cursor = get_comment_page(
+            news, request.user, request.GET.get('after')
+        )
+        if request.GET.get('format') == 'json':
+            return JsonResponse({
+                'comments': [
+                    {
+                        'id': comment.pk,
+                        'author': comment.author.get_username(),
+                        'text': comment.text,
+                        'created': comment.created.isoformat(),
+                    }
+                    for comment in comments
+                ],
+                'next': next_cursor,
+            })
+        return render(request, self.template_name, {
+            'news': news,
+            'comments': comments,
+            'next_cursor': next_cursor,
+        })
+
+
 class CommentBase(LoginRequiredMixin):
     """Базовый класс для работы с комментариями."""
     model = Comment
 
     def get_success_url(self):
-        comment = self.get_object()
+        """Адрес строим по уже загруженному комментарию, без запросов."""
         return reverse(
-            'news:detail', kwargs={'pk': comment.news.pk}
+            'news:detail', kwargs={'pk': self.object.news_id}
         ) + '#comments'
 
     def get_queryset(self):
         """Пользователь может работать только со своими комментариями."""
-        return self.model.objects.filter(author=self.request.user)
+        return self.model.objects.filter(
+            author=self.request.user
+        ).select_related('news')
 
 
 class CommentUpdate(CommentBase, generic.UpdateView):
@@ -98,7 +246,70 @@ class CommentUpdate(CommentBase, generic.UpdateView):
     template_name = 'news/edit.html'
     form_class = CommentForm
 
+    def form_valid(self, form):
+        """Исправленный текст снова проходит модерацию."""
+        if settings.NEWS_COMMENT_MODERATION:
+            form.instance.status = Comment.Status.PENDING
+        return super().form_valid(form)
+
 
 class CommentDelete(CommentBase, generic.DeleteView):
     """Удаление комментария."""
     template_name = 'news/delete.html'
+
+
+# Асинхронные варианты главной и страницы новости для ASGI, включаются
+# настройкой NEWS_ASYNC_VIEWS. В Django 3.2 нет асинхронного ORM,
+# поэтому все чтения из базы собраны в один вызов sync_to_async,
+# а шаблон рендерится уже в цикле событий по готовым данным.
+
+SAFE_METHODS = ('GET', 'HEAD')
+
+news_detail_sync = NewsDetailView.as_view()
+
+
+async def is_authenticated(request):
+    """
+    Авторизован ли пользователь.
+
+    Без cookie сессии пользователь анонимный и база не нужна. Иначе
+    сессия и пользователь читаются в потоке, а шаблон потом берёт их
+    из памяти.
+    """
+    if settings.SESSION_COOKIE_NAME not in request.COOKIES:
+        return False
+    return await sync_to_async(lambda: request.user.is_authenticated)()
+
+
+def render_home_page(request):
+    return render(request, NewsList.template_name, {
+        'object_list': list(latest_news()),
+    }).content
+
+
+async def news_home(request):
+    """Главная; анонимам из кэша прямо в цикле событий, без потока."""
+    if request.method not in SAFE_METHODS:
+        return HttpResponseNotAllowed(SAFE_METHODS)
+    if not await is_authenticated(request):
+        content = peek_home_page()
+        if content is None:
+            content = await sync_to_async(get_home_page)(
+                lambda: render_home_page(request)
+            )
+        return HttpResponse(content)
+    news = await sync_to_async(lambda: list(latest_news()))()
+    return render(request, NewsList.template_name, {'object_list': news})
+
+
+async def news_detail(request, pk):
+    """
+    Страница новости и отправка комментария.
+
+    Валидаторы, новость и страница комментариев читаются одним вызовом
+    синхронного представления, ответ 304 уходит без рендера.
+    """
+    response = await sync_to_async(news_detail_sync)(request, pk=pk)
+    if hasattr(response, 'render') and not response.is_rendered:
+        response.render()
+    return response
@@ -0,0 +1,98 @@
+"""
+Чтение с реплик, запись в основную базу.
+
+Реплики перечислены в DATABASE_REPLICAS. Чтение идёт в основную базу,
+если запрос пишет сам или пользователь писал недавно (см.
+ReplicaPinMiddleware), а также внутри транзакции основной базы.
+"""
+import asyncio
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PIN_COOKIE = 'pin_primary'
+
+_pinned = ContextVar('pinned_to_primary', default=False)
+
+
+@contextmanager
+def use_primary():
+    """Все чтения внутри блока идут в основную базу."""
+    token = _pinned.set(True)
+    try:
+        yield
+    finally:
+        _pinned.reset(token)
+
+
+class PrimaryReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if (not replicas or _pinned.get()
+                or connections[DEFAULT_DB_ALIAS].in_atomic_block):
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # На всех базах одни и те же данные.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Схему реплики получают репликацией (локально — sync_replicas).
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaPinMiddleware:
+    """
+    Read-your-writes для реплик.
+
+    Запрос, который может писать (не GET/HEAD/OPTIONS), читает
+    из основной базы и ставит cookie на DATABASE_REPLICA_PIN_SECONDS:
+    пока она жива, чтения этого браузера тоже идут в основную базу,
+    и автор сразу видит свой комментарий, даже если реплика отстаёт.
+    """
+
+    SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+    sync_capable = async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Как MiddlewareMixin: под ASGI цепочка остаётся асинхронной.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        if not self.reads_primary(request):
+            return self.get_response(request)
+        with use_primary():
+            response = self.get_response(request)
+        return self.pin(request, response)
+
+    async def __acall__(self, request):
+        if not self.reads_primary(request):
+            return await self.get_response(request)
+        with use_primary():
+            response = await self.get_response(request)
+        return self.pin(request, response)
+
+    def reads_primary(self, request):
+        return (request.method not in self.SAFE_METHODS
+                or PIN_COOKIE in request.COOKIES)
+
+    def pin(self, request, response):
+        if request.method not in self.SAFE_METHODS:
+            response.set_cookie(
+                PIN_COOKIE, '1',
+                max_age=settings.DATABASE_REPLICA_PIN_SECONDS,
+                httponly=True, samesite='Lax',
+            )
+        return response
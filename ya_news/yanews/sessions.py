@@ -0,0 +1,60 @@
+"""
+Сессии в кэше с отложенной записью в базу.
+
+Подключается через SESSION_ENGINE = 'yanews.sessions', см.
+settings_sessions.
+"""
+from time import time
+
+from django.conf import settings
+from django.contrib.auth import HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.sessions.backends import cached_db
+
+
+class SessionStore(cached_db.SessionStore):
+    """
+    Сессия читается из кэша, база — только при промахе.
+
+    Изменения сразу попадают в кэш, а в базу — при создании сессии,
+    входе, выходе и смене пароля, остальные не чаще раза
+    в SESSION_DB_WRITE_INTERVAL секунд. База остаётся запасной копией:
+    если кэш потеряет сессию, пользователь не разлогинится.
+    """
+
+    @property
+    def written_key(self):
+        return self.cache_key + ':written'
+
+    def save(self, must_create=False):
+        if self.session_key is None:
+            return self.create()
+        if must_create or self.db_is_stale():
+            super().save(must_create)
+            self._cache.set(
+                self.written_key, (self.auth_state(), time()),
+                self.get_expiry_age(),
+            )
+        else:
+            self._cache.set(self.cache_key, self._session,
+                            self.get_expiry_age())
+
+    def db_is_stale(self):
+        written = self._cache.get(self.written_key)
+        if written is None:
+            return True
+        auth_state, written_at = written
+        return (auth_state != self.auth_state()
+                or time() - written_at >= settings.SESSION_DB_WRITE_INTERVAL)
+
+    def auth_state(self):
+        return self._session.get(SESSION_KEY), self._session.get(
+            HASH_SESSION_KEY
+        )
+
+    def delete(self, session_key=None):
+        super().delete(session_key)
+        session_key = session_key or self.session_key
+        if session_key is not None:
+            self._cache.delete(
+                self.cache_key_prefix + session_key + ':written'
+            )
@@ -55,12 +55,28 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Тестовая база в файле, а не в памяти: в общей памяти SQLite
+        # параллельные писатели получают «database table is locked».
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
 
+# PRAGMA для каждого нового соединения с SQLite, см. settings_production.
+SQLITE_PRAGMAS = {}
+
+# Алиасы реплик для чтения и сколько секунд после записи браузер читает
+# из основной базы, см. settings_replicas.
+DATABASE_REPLICAS = []
+DATABASE_REPLICA_PIN_SECONDS = 5
+
 
 AUTH_PASSWORD_VALIDATORS = []
 
+# Сколько секунд изменения сессии могут жить только в кэше и сколько
+# секунд пользователь сессии хранится в кэше, см. settings_sessions.
+SESSION_DB_WRITE_INTERVAL = 60
+AUTH_USER_CACHE_TIMEOUT = 5 * 60
+
 
 LANGUAGE_CODE = 'ru'
 
@@ -80,3 +96,17 @@ LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('news:home')
 
 NEWS_COUNT_ON_HOME_PAGE = 10
+# Асинхронные главная и страница новости — для запуска под ASGI.
+NEWS_ASYNC_VIEWS = False
+NEWS_HOME_PAGE_CACHE_TIMEOUT = 60
+NEWS_HOME_PAGE_LOCK_TIMEOUT = 10
+
+COMMENTS_COUNT_ON_DETAIL_PAGE = 50
+
+NEWS_SEARCH_PAGE_SIZE = 10
+
+NEWS_COMMENT_MODERATION = True
+NEWS_COMMENT_MAX_LINKS = 2
+
+BAD_WORDS_FILE = None
+BAD_WORDS_WORD_BOUNDARY = False
@@ -0,0 +1,4 @@
+"""Запуск под ASGI: главная и страница новости — асинхронные."""
+from .settings import *  # noqa: F401, F403
+
+NEWS_ASYNC_VIEWS = True
@@ -0,0 +1,34 @@
+"""
+Основная база и реплики для чтения.
+
+Локально реплики — отдельные файлы SQLite, их содержимое копирует
+из основной базы команда sync_replicas. В тестах реплики зеркалят
+основную базу.
+"""
+from .settings import *  # noqa: F401, F403
+from .settings import BASE_DIR, DATABASES, MIDDLEWARE
+
+DATABASE_REPLICAS = ['replica1', 'replica2']
+
+# Новый словарь, как и в settings_production: DATABASES модуля
+# settings остаётся без реплик.
+DATABASES = {
+    **DATABASES,
+    **{
+        alias: {
+            **DATABASES['default'],
+            'NAME': BASE_DIR / f'{alias}.sqlite3',
+            'TEST': {'MIRROR': 'default'},
+        }
+        for alias in DATABASE_REPLICAS
+    },
+}
+
+DATABASE_ROUTERS = ['yanews.routers.PrimaryReplicaRouter']
+
+# До сессий и пользователя: их чтения тоже должны знать, куда идти.
+MIDDLEWARE = [
+    *MIDDLEWARE[:1],
+    'yanews.routers.ReplicaPinMiddleware',
+    *MIDDLEWARE[1:],
+]
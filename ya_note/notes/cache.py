@@ -0,0 +1,51 @@
+from time import time_ns
+
+from django.conf import settings
+from django.core.cache import caches
+
+DETAIL_GENERATION_KEY = 'notes:detail:{author_id}:{slug}:generation'
+DETAIL_KEY = 'notes:detail:{author_id}:{slug}:{generation}'
+
+
+def _cache():
+    """Бэкенд выбирается настройкой NOTES_DETAIL_CACHE."""
+    return caches[settings.NOTES_DETAIL_CACHE]
+
+
+def _generation(cache, author_id, slug):
+    key = DETAIL_GENERATION_KEY.format(author_id=author_id, slug=slug)
+    cache.add(key, time_ns(), None)
+    return cache.get(key)
+
+
+def get_note_body(author_id, slug, build):
+    """
+    Возвращает отрендеренное тело заметки из кэша.
+
+    Ключ включает автора, slug и поколение. Изменение заметки переводит
+    ключ в новое поколение, поэтому тело, которое строилось во время
+    изменения, в кэш попадёт, но читать его уже никто не будет.
+    """
+    timeout = settings.NOTES_DETAIL_CACHE_TIMEOUT
+    if not timeout:
+        return build()
+    cache = _cache()
+    key = DETAIL_KEY.format(
+        author_id=author_id, slug=slug,
+        generation=_generation(cache, author_id, slug),
+    )
+    body = cache.get(key)
+    if body is None:
+        body = build()
+        cache.set(key, body, timeout)
+    return body
+
+
+def invalidate_note(author_id, slug):
+    """Сбрасывает кэш заметки автора с этим slug."""
+    cache = _cache()
+    key = DETAIL_GENERATION_KEY.format(author_id=author_id, slug=slug)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time_ns(), None)
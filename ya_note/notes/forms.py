@@ -1,29 +1,141 @@
-from pytils.translit import slugify
-
 from django import forms
 from django.core.exceptions import ValidationError
 
-from .models import Note
+from .models import MAX_ID, Note, Tag
+from .tags import get_tags, parse_tag_names, tag_notes, untag_notes
 
 WARNING = ' - такой slug уже существует, придумайте уникальное значение!'
 
 
 class NoteForm(forms.ModelForm):
     """Форма для создания или обновления заметки."""
+    tag_names = forms.CharField(
+        label='Метки',
+        required=False,
+        help_text='Через запятую: работа, идеи',
+    )
 
     class Meta:
         model = Note
         fields = ('title', 'text', 'slug')
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.pk:
+            self.initial['tag_names'] = ', '.join(
+                self.instance.tags.values_list('name', flat=True)
+            )
+
     def clean_slug(self):
-        """Обрабатывает случай, если slug не уникален."""
-        cleaned_data = super().clean()
-        slug = cleaned_data.get('slug')
+        """Обрабатывает случай, если slug не уникален.
+
+        Пустой slug подберёт сама модель при сохранении — с суффиксом,
+        если адрес из заголовка уже занят.
+        """
+        slug = self.cleaned_data.get('slug')
         if not slug:
-            title = cleaned_data.get('title')
-            slug = slugify(title)[:100]
+            return slug
         if Note.objects.filter(
                 slug=slug
         ).exclude(id=self.instance.pk).exists():
             raise ValidationError(slug + WARNING)
         return slug
+
+    def clean_tag_names(self):
+        names = parse_tag_names(self.cleaned_data['tag_names'])
+        max_length = Tag._meta.get_field('name').max_length
+        for name in names:
+            if len(name) > max_length:
+                raise ValidationError(
+                    f'Метка длиннее {max_length} символов: {name}'
+                )
+        return names
+
+    def _save_m2m(self):
+        """Метки сохраняются вместе с заметкой, у которой уже есть автор."""
+        super()._save_m2m()
+        note = self.instance
+        note.tags.set(get_tags(note.author, self.cleaned_data['tag_names']))
+
+
+class IdListField(forms.Field):
+    """Список id из повторяющегося параметра формы (?ids=1&ids=2)."""
+    widget = forms.MultipleHiddenInput
+
+    def to_python(self, value):
+        try:
+            ids = [int(item) for item in value or ()]
+        except (TypeError, ValueError):
+            raise ValidationError('Некорректный список заметок.')
+        # Больший id база не сравнит, а упадёт с OverflowError.
+        if any(not 0 < pk <= MAX_ID for pk in ids):
+            raise ValidationError('Некорректный список заметок.')
+        return ids
+
+
+class NoteBulkForm(forms.Form):
+    """Действие над выбранными заметками или над всеми из списка."""
+    ACTIONS = (
+        ('delete', 'Удалить'),
+        ('archive', 'В архив'),
+        ('unarchive', 'Из архива'),
+        ('tag', 'Поставить метку'),
+        ('untag', 'Снять метку'),
+    )
+    TAG_ACTIONS = ('tag', 'untag')
+
+    action = forms.ChoiceField(choices=ACTIONS)
+    ids = IdListField(required=False)
+    select_all = forms.BooleanField(required=False)
+    archived = forms.BooleanField(required=False)
+    listed_tag = forms.CharField(required=False)
+    tag = forms.CharField(
+        required=False,
+        max_length=Tag._meta.get_field('name').max_length,
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if not cleaned_data.get('ids') and not cleaned_data.get('select_all'):
+            raise ValidationError('Не выбрано ни одной заметки.')
+        if (cleaned_data.get('action') in self.TAG_ACTIONS
+                and not cleaned_data.get('tag', '').strip()):
+            raise ValidationError('Не указана метка.')
+        return cleaned_data
+
+    def select(self, notes):
+        """
+        Заметки, к которым применяется действие.
+
+        notes уже ограничены автором; «все» — это все заметки
+        показанного списка: активные или архив, с меткой listed_tag,
+        если список по ней отфильтрован.
+        """
+        notes = notes.filter(is_archived=self.cleaned_data['archived'])
+        if self.cleaned_data['listed_tag']:
+            notes = notes.filter(tags__name=self.cleaned_data['listed_tag'])
+        if self.cleaned_data['select_all']:
+            return notes
+        return notes.filter(pk__in=self.cleaned_data['ids'])
+
+    def apply(self, notes, author):
+        """Выполняет действие одним запросом, возвращает число заметок."""
+        notes = self.select(notes)
+        action = self.cleaned_data['action']
+        if action in self.TAG_ACTIONS:
+            return self.apply_tag(notes, author)
+        if action == 'delete':
+            # Сигналам удаления нужны только автор и slug, не текст.
+            deleted = notes.only('id', 'author_id', 'slug').delete()[1]
+            return deleted.get(notes.model._meta.label, 0)
+        return notes.update(is_archived=action == 'archive')
+
+    def apply_tag(self, notes, author):
+        """Метка ставится или снимается без загрузки самих заметок."""
+        name = self.cleaned_data['tag'].strip()
+        if self.cleaned_data['action'] == 'tag':
+            return tag_notes(notes, get_tags(author, [name])[0])
+        tag = Tag.objects.filter(author=author, name=name).first()
+        if tag is None:
+            return 0
+        return untag_notes(notes, tag)
@@ -0,0 +1,10 @@
+from itertools import islice
+
+
+def batched(items, size):
+    """Разбивает поток на списки по size элементов, не читая его целиком."""
+    items = iter(items)
+    batch = list(islice(items, size))
+    while batch:
+        yield batch
+        batch = list(islice(items, size))
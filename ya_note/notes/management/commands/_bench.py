@@ -0,0 +1,51 @@
+from contextlib import contextmanager
+from time import perf_counter
+
+from django.db import OperationalError, connection, connections
+from django.test.utils import (
+    setup_test_environment, teardown_test_environment
+)
+
+
+@contextmanager
+def test_database():
+    """Временная тестовая база, чтобы замеры не трогали рабочие данные."""
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(
+        verbosity=0, autoclobber=True
+    )
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def measure(func, repeat):
+    """Запускает func repeat раз, возвращает число вызовов в секунду."""
+    started = perf_counter()
+    for _ in range(repeat):
+        func()
+    return repeat / (perf_counter() - started)
+
+
+def hammer(send, requests):
+    """
+    Выполняет send(number) requests раз в своём потоке.
+
+    Возвращает число успешных запросов и ошибок блокировки базы.
+    """
+    done = locked = 0
+    try:
+        for number in range(requests):
+            try:
+                send(number)
+                done += 1
+            except OperationalError as error:
+                if 'locked' not in str(error):
+                    raise
+                locked += 1
+    finally:
+        # У каждого потока своё соединение, его закрываем сами.
+        connections.close_all()
+    return done, locked
@@ -0,0 +1,75 @@
+from statistics import mean
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db.models.signals import post_save
+from django.test import Client
+from django.urls import reverse
+
+from notes.models import Note, NoteRevision
+from notes.signals import save_revision
+from ._bench import measure, test_database
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет, во сколько обходится история версий одному '
+        'сохранению через NoteUpdate, и место на одну версию.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lines', type=int, default=2_000,
+            help='Строк в заметке (по ~60 символов).'
+        )
+        parser.add_argument('--edits', type=int, default=200)
+
+    def edit(self, client, note, lines, counter):
+        """Одна правка: меняется одна строка заметки."""
+        number = next(counter)
+        lines[number * 7 % len(lines)] = f'Правка номер {number}\n'
+        client.post(reverse('notes:edit', args=[note.slug]), {
+            'title': note.title, 'text': ''.join(lines), 'slug': note.slug,
+        })
+
+    def run(self, user, options, name):
+        lines = [
+            f'Строка {number} заметки, в которой немного текста.\n'
+            for number in range(options['lines'])
+        ]
+        note = Note.objects.create(
+            title='Большая заметка', text=''.join(lines), author=user,
+            slug=name,
+        )
+        client = Client()
+        client.force_login(user)
+        counter = iter(range(options['edits']))
+        rate = measure(
+            lambda: self.edit(client, note, lines, counter), options['edits']
+        )
+        return note, 1000 / rate
+
+    def handle(self, *args, **options):
+        with test_database():
+            user = get_user_model().objects.create(username='bench')
+            post_save.disconnect(save_revision, sender=Note)
+            try:
+                _, without = self.run(user, options, 'without-history')
+            finally:
+                post_save.connect(save_revision, sender=Note)
+            note, with_history = self.run(user, options, 'with-history')
+            revisions = NoteRevision.objects.filter(note=note)
+            snapshots = [len(item.data) for item in revisions
+                         if item.is_snapshot]
+            deltas = [len(item.data) for item in revisions
+                      if not item.is_snapshot]
+            self.stdout.write(
+                f'Заметка {len(note.text)} символов, '
+                f'{options["edits"]} правок по одной строке\n'
+                f'NoteUpdate без истории {without:.2f} мс, '
+                f'с историей {with_history:.2f} мс '
+                f'(+{with_history - without:.2f} мс)\n'
+                f'Полный текст: {len(snapshots)} шт. по '
+                f'{mean(snapshots):.0f} байт, разница: {len(deltas)} шт. '
+                f'по {mean(deltas):.0f} байт'
+            )
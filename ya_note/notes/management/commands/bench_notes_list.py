@@ -0,0 +1,59 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.urls import reverse
+
+from notes.models import Note
+from ._bench import measure, test_database
+
+BATCH_SIZE = 5_000
+TEXT = 'Текст заметки. ' * 20
+
+
+def create_notes(user, count):
+    for start in range(0, count, BATCH_SIZE):
+        Note.objects.bulk_create(
+            Note(title=f'Заметка {number}', text=TEXT,
+                 slug=f'{user.username}-{number}', author=user)
+            for number in range(start, min(start + BATCH_SIZE, count))
+        )
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет время списка заметок на 100, 10k и 1M заметок '
+        'у одного пользователя: прежний полный список против страниц.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', default='100,10000,1000000',
+            help='Размеры списков через запятую.'
+        )
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',')]
+        repeat = options['repeat']
+        url = reverse('notes:list')
+        with test_database():
+            for size in sizes:
+                user = get_user_model().objects.create(username=f'u{size}')
+                create_notes(user, size)
+                client = Client()
+                client.force_login(user)
+                last = Note.objects.filter(author=user).latest('id').id
+                deep = {'after': last - settings.NOTES_COUNT_ON_LIST_PAGE}
+                full = measure(
+                    lambda: list(Note.objects.filter(author=user)),
+                    max(1, repeat // 10)
+                )
+                first = measure(lambda: client.get(url), repeat)
+                deepest = measure(lambda: client.get(url, deep), repeat)
+                self.stdout.write(
+                    f'{size:>8} заметок: весь список (ORM) '
+                    f'{1000 / full:9.2f} мс, первая страница '
+                    f'{1000 / first:7.2f} мс, '
+                    f'последняя {1000 / deepest:7.2f} мс'
+                )
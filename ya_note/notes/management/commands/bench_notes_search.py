@@ -0,0 +1,83 @@
+import random
+from statistics import mean, quantiles
+from time import perf_counter
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from notes.models import Note
+from notes.search import SearchResults
+from ._bench import test_database
+
+ALPHABET = 'абвгдежзийклмнопрстуфхцчшщэюя'
+BATCH_SIZE = 5_000
+VOCABULARY_SIZE = 20_000
+PAGE_SIZE = 20
+
+
+def random_word(rng):
+    return ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(4, 10)))
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест поиска по заметкам: 1M заметок у 10k авторов, '
+        'запросы по префиксам слов от случайных авторов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--notes', type=int, default=1_000_000)
+        parser.add_argument('--authors', type=int, default=10_000)
+        parser.add_argument('--queries', type=int, default=1_000)
+
+    def create_corpus(self, rng, vocabulary, notes, authors):
+        User = get_user_model()
+        User.objects.bulk_create(
+            User(id=pk, username=f'user{pk}') for pk in range(1, authors + 1)
+        )
+        for start in range(1, notes + 1, BATCH_SIZE):
+            batch = [
+                Note(
+                    id=pk, slug=f'note-{pk}', author_id=pk % authors + 1,
+                    title=' '.join(rng.choices(vocabulary, k=4)),
+                    text=' '.join(rng.choices(vocabulary, k=40)),
+                )
+                for pk in range(start, min(start + BATCH_SIZE, notes + 1))
+            ]
+            # Индекс поиска заполняют триггеры на таблице заметок.
+            with transaction.atomic():
+                Note.objects.bulk_create(batch)
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        vocabulary = [random_word(rng) for _ in range(VOCABULARY_SIZE)]
+        with test_database():
+            started = perf_counter()
+            self.create_corpus(
+                rng, vocabulary, options['notes'], options['authors']
+            )
+            self.stdout.write(
+                f'Корпус: {options["notes"]} заметок у {options["authors"]} '
+                f'авторов за {perf_counter() - started:.1f} с'
+            )
+            timings, found = [], 0
+            for _ in range(options['queries']):
+                # Ищем начала слов из случайной заметки от имени её автора.
+                note = Note.objects.only('text', 'author_id').get(
+                    pk=rng.randint(1, options['notes'])
+                )
+                words = rng.sample(note.text.split(), rng.randint(1, 2))
+                query = ' '.join(word[:rng.randint(2, 6)] for word in words)
+                results = SearchResults(query, note.author_id)
+                started = perf_counter()
+                found += results.count()
+                list(results[:PAGE_SIZE])
+                timings.append((perf_counter() - started) * 1000)
+            p50, p95 = (quantiles(timings, n=100)[index] for index in (49, 94))
+            self.stdout.write(
+                f'Запрос (число совпадений + страница): среднее '
+                f'{mean(timings):.2f} мс, p50 {p50:.2f} мс, '
+                f'p95 {p95:.2f} мс, максимум {max(timings):.2f} мс, '
+                f'в среднем {found / len(timings):.1f} совпадений'
+            )
@@ -0,0 +1,86 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from notes.models import Note, NoteTag, Tag
+from ._bench import measure, test_database
+from .bench_notes_list import BATCH_SIZE, create_notes
+
+# Метка и шаг: каждая step-я заметка получает метку.
+TAGS = (('частая', 10), ('редкая', 1000))
+
+
+def tag_notes(user, tags):
+    ids = Note.objects.filter(author=user).values_list('id', flat=True)
+    for start in range(0, len(ids), BATCH_SIZE):
+        NoteTag.objects.bulk_create(
+            NoteTag(note_id=pk, tag=tag)
+            for pk in ids[start:start + BATCH_SIZE]
+            for tag, step in tags if pk % step == 0
+        )
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет список заметок, отфильтрованный по метке, '
+        'у пользователя с 1M заметок и число заметок у меток.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=1_000_000)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        size, repeat = options['size'], options['repeat']
+        url = reverse('notes:list')
+        with test_database():
+            user = get_user_model().objects.create(username='bench')
+            create_notes(user, size)
+            tags = [
+                (Tag.objects.create(author=user, name=name), step)
+                for name, step in TAGS
+            ]
+            tag_notes(user, tags)
+            client = Client()
+            client.force_login(user)
+            with CaptureQueriesContext(connection) as queries:
+                client.get(url, {'tag': tags[0][0].name, 'after': 1})
+            sql = next(query['sql'] for query in queries
+                       if 'notes_notetag' in query['sql'])
+            self.stdout.write('План запроса страницы по метке:')
+            with connection.cursor() as cursor:
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+                for row in cursor.fetchall():
+                    self.stdout.write(f'  {row[-1]}')
+            for tag, step in tags:
+                tag.refresh_from_db()
+                last = tag.notes.latest('id').id
+                deep = {
+                    'tag': tag.name,
+                    'after': last - step * settings.NOTES_COUNT_ON_LIST_PAGE,
+                }
+                first = measure(
+                    lambda: client.get(url, {'tag': tag.name}), repeat
+                )
+                deepest = measure(lambda: client.get(url, deep), repeat)
+                self.stdout.write(
+                    f'{tag.name} ({tag.note_count} заметок): первая '
+                    f'страница {1000 / first:7.2f} мс, последняя '
+                    f'{1000 / deepest:7.2f} мс'
+                )
+            counted = measure(lambda: list(
+                Tag.objects.filter(author=user).annotate(Count('notes'))
+            ), max(1, repeat // 10))
+            stored = measure(lambda: list(
+                Tag.objects.filter(author=user, note_count__gt=0)
+            ), repeat)
+            self.stdout.write(
+                f'Число заметок у меток: COUNT по связям '
+                f'{1000 / counted:9.2f} мс, поле note_count '
+                f'{1000 / stored:7.2f} мс'
+            )
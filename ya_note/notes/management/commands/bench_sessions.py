@@ -0,0 +1,80 @@
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth import get_user, get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.http import HttpRequest
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from notes.models import Note
+from ._bench import measure, test_database
+
+# Движок сессий, бэкенды аутентификации и подпись в отчёте.
+MODES = (
+    ('django.contrib.sessions.backends.db',
+     ['django.contrib.auth.backends.ModelBackend'],
+     'сессии в базе'),
+    ('django.contrib.sessions.backends.signed_cookies',
+     ['django.contrib.auth.backends.ModelBackend'],
+     'подписанная cookie'),
+    ('yanote.sessions',
+     ['yanote.auth.CachedModelBackend'],
+     'кэш + пользователь из кэша'),
+)
+
+
+def load_user(session_key):
+    """То, что делают SessionMiddleware и AuthenticationMiddleware."""
+    request = HttpRequest()
+    engine = import_module(settings.SESSION_ENGINE)
+    request.session = engine.SessionStore(session_key)
+    return get_user(request)
+
+
+class Command(BaseCommand):
+    help = (
+        'Печатает число SQL-запросов и запросы в секунду для списка '
+        'заметок у авторизованного пользователя, а также время загрузки '
+        'сессии и пользователя при разных движках сессий (профиль '
+        'settings_sessions).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500)
+
+    def handle(self, *args, **options):
+        requests = options['requests']
+        with test_database():
+            user = get_user_model().objects.create(username='bench')
+            Note.objects.create(title='Заметка', text='Текст', author=user)
+            url = reverse('notes:list')
+            for engine, backends, title in MODES:
+                with override_settings(
+                    SESSION_ENGINE=engine,
+                    AUTHENTICATION_BACKENDS=backends,
+                ):
+                    cache.clear()
+                    client = Client()
+                    client.force_login(user)
+                    # Первый запрос заполняет кэш.
+                    client.get(url)
+                    with CaptureQueriesContext(connection) as context:
+                        client.get(url)
+                    # request_started очищает журнал запросов.
+                    queries = len(context)
+                    rps = measure(lambda: client.get(url), requests)
+                    session_key = client.cookies[
+                        settings.SESSION_COOKIE_NAME
+                    ].value
+                    loads = measure(
+                        lambda: load_user(session_key), requests * 10
+                    )
+                self.stdout.write(
+                    f'{title:<28}{queries:>3} запросов, '
+                    f'{rps:7.1f} запросов/с, сессия и пользователь '
+                    f'{1_000_000 / loads:7.1f} мкс'
+                )
@@ -0,0 +1,60 @@
+import random
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from pytils.translit import slugify
+
+from notes.slugs import make_slug
+
+ALPHABET = 'абвгдежзийклмнопрстуфхцчшщъыьэюя'
+
+
+def random_title(rng):
+    words = (
+        ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(3, 10)))
+        for _ in range(rng.randint(2, 6))
+    )
+    return ' '.join(words).capitalize()
+
+
+def rate(func, titles):
+    """Заголовков в секунду."""
+    started = perf_counter()
+    for title in titles:
+        func(title)
+    return len(titles) / (perf_counter() - started)
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает скорость pytils slugify и make_slug с кэшем '
+        'на кириллических заголовках.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--titles', type=int, default=100_000)
+        parser.add_argument(
+            '--distinct', type=int, default=1_000,
+            help='Сколько разных заголовков среди повторяющихся.'
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        count = options['titles']
+        unique = [random_title(rng) for _ in range(count)]
+        pool = [random_title(rng) for _ in range(options['distinct'])]
+        repeated = [rng.choice(pool) for _ in range(count)]
+        for name, titles in (('unique', unique), ('repeated', repeated)):
+            make_slug.cache_clear()
+            before = rate(slugify, titles)
+            after = rate(make_slug, titles)
+            self.stdout.write(
+                f'{name:>8}: slugify {before:10.0f}/s, '
+                f'make_slug {after:10.0f}/s'
+            )
+        ascii_titles = [slugify(title) for title in unique]
+        make_slug.cache_clear()
+        self.stdout.write(
+            f'{"ascii":>8}: slugify {rate(slugify, ascii_titles):10.0f}/s, '
+            f'make_slug {rate(make_slug, ascii_titles):10.0f}/s'
+        )
@@ -0,0 +1,79 @@
+import json
+from contextlib import contextmanager
+from time import perf_counter
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from notes.models import Note, NoteTag
+from ._batches import batched
+
+FIELDS = ('title', 'text', 'slug', 'is_archived')
+# Пачка помещается в старый лимит SQLite в 999 параметров для IN.
+TAGS_BATCH_SIZE = 900
+
+
+def add_tag_names(notes):
+    """Добавляет заметкам пачки названия меток одним запросом."""
+    by_id = {note.pop('id'): note for note in notes}
+    for note in notes:
+        note['tags'] = []
+    links = NoteTag.objects.filter(note_id__in=by_id).order_by(
+        'tag__name'
+    ).values_list('note_id', 'tag__name')
+    for note_id, name in links:
+        by_id[note_id]['tags'].append(name)
+    return notes
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково выгружает заметки автора в JSON Lines '
+        'в формате, который читает import_notes: вместе с признаком '
+        'архива и метками.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('author', help='Имя пользователя-автора.')
+        parser.add_argument(
+            'path', nargs='?', default='-',
+            help='Файл для выгрузки; «-» — писать в stdout.'
+        )
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    @contextmanager
+    def open(self, path):
+        if path == '-':
+            yield self.stdout
+            return
+        try:
+            file = open(path, 'w', encoding='utf-8')
+        except OSError as error:
+            raise CommandError(error)
+        with file:
+            yield file
+
+    def handle(self, *args, **options):
+        try:
+            author = get_user_model().objects.get_by_natural_key(
+                options['author']
+            )
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'Нет пользователя {options["author"]}.')
+        notes = Note.objects.filter(author=author).order_by('id').values(
+            'id', *FIELDS
+        ).iterator(chunk_size=options['chunk_size'])
+        exported = 0
+        started = perf_counter()
+        with self.open(options['path']) as file:
+            for chunk in batched(notes, TAGS_BATCH_SIZE):
+                for note in add_tag_names(chunk):
+                    file.write(json.dumps(note, ensure_ascii=False) + '\n')
+                exported += len(chunk)
+        elapsed = perf_counter() - started
+        # В stdout идут сами заметки, отчёт пишем в stderr.
+        report = self.stderr if options['path'] == '-' else self.stdout
+        report.write(
+            f'Выгружено: {exported} заметок за {elapsed:.1f} с '
+            f'({exported / elapsed if elapsed else exported:.0f} строк/с)'
+        )
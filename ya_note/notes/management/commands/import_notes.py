@@ -0,0 +1,169 @@
+import json
+import sys
+from contextlib import contextmanager
+from time import perf_counter
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.core.validators import validate_slug
+from django.db import reset_queries, transaction
+
+from notes.models import Note, NoteTag, Tag
+from notes.slugs import SlugPool, bulk_create_with_slugs
+from notes.tags import SEPARATOR, get_tags, parse_tag_names
+from ._batches import batched
+
+
+def read_jsonl(file):
+    for number, line in enumerate(file, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as error:
+            raise CommandError(f'Строка {number}: {error}')
+
+
+def build_note(row, author):
+    """Заметка из строки файла или None, если строка неполная."""
+    if not isinstance(row, dict):
+        return None
+    title = str(row.get('title') or '').strip()
+    text = str(row.get('text') or '').strip()
+    if not title or not text:
+        return None
+    slug = str(row.get('slug') or '').strip()
+    try:
+        validate_slug(slug)
+    except ValidationError:
+        slug = ''
+    note = Note(
+        title=title[:Note._meta.get_field('title').max_length],
+        text=text,
+        slug=slug[:Note._meta.get_field('slug').max_length],
+        author=author,
+        is_archived=row.get('is_archived') is True,
+    )
+    note.render_html()
+    return note
+
+
+def read_tag_names(row):
+    """Названия меток из строки файла: список или строка через запятую."""
+    tags = row.get('tags') or ''
+    if isinstance(tags, list):
+        tags = SEPARATOR.join(map(str, tags))
+    max_length = Tag._meta.get_field('name').max_length
+    return list(dict.fromkeys(
+        name[:max_length] for name in parse_tag_names(str(tags))
+    ))
+
+
+def tag_imported(author, notes, tag_names):
+    """
+    Ставит созданным заметкам метки из файла.
+
+    bulk_create в SQLite не возвращает id, поэтому они читаются
+    по slug. Запросы — на метки, id и связи, по одному на пачку.
+    """
+    wanted = {name for names in tag_names for name in names}
+    if not wanted:
+        return
+    tags = {tag.name: tag for tag in get_tags(author, sorted(wanted))}
+    ids = dict(Note.objects.filter(
+        slug__in=[note.slug for note in notes]
+    ).values_list('slug', 'pk'))
+    NoteTag.objects.bulk_create(
+        [
+            NoteTag(note_id=ids[note.slug], tag=tags[name])
+            for note, names in zip(notes, tag_names)
+            for name in names
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def release_taken_slugs(notes):
+    """
+    Сбрасывает slug из файла, если он уже занят.
+
+    Такие заметки получат свободный slug из заголовка, как и заметки
+    без slug. Проверка — один запрос на пачку.
+    """
+    slugs = [note.slug for note in notes if note.slug]
+    taken = set(
+        Note.objects.filter(slug__in=slugs).values_list('slug', flat=True)
+    )
+    for note in notes:
+        if note.slug in taken:
+            note.slug = ''
+        elif note.slug:
+            taken.add(note.slug)
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково импортирует заметки автора из JSON Lines. '
+        'Поля: title, text и необязательные slug, is_archived и tags '
+        '(список названий меток).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('author', help='Имя пользователя-автора.')
+        parser.add_argument(
+            'path', nargs='?', default='-',
+            help='Файл с заметками; «-» — читать из stdin.'
+        )
+        # Пачка помещается в старый лимит SQLite в 999 параметров для IN.
+        parser.add_argument('--batch-size', type=int, default=900)
+
+    @contextmanager
+    def open(self, path):
+        if path == '-':
+            yield sys.stdin
+            return
+        try:
+            file = open(path, encoding='utf-8')
+        except OSError as error:
+            raise CommandError(error)
+        with file:
+            yield file
+
+    def handle(self, *args, **options):
+        try:
+            author = get_user_model().objects.get_by_natural_key(
+                options['author']
+            )
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'Нет пользователя {options["author"]}.')
+        created = skipped = 0
+        pool = SlugPool(Note)
+        started = perf_counter()
+        with self.open(options['path']) as file:
+            for rows in batched(read_jsonl(file), options['batch_size']):
+                notes = [build_note(row, author) for row in rows]
+                batch, tag_names = [], []
+                for note, row in zip(notes, rows):
+                    if note is not None:
+                        batch.append(note)
+                        tag_names.append(read_tag_names(row))
+                skipped += len(notes) - len(batch)
+                with transaction.atomic():
+                    release_taken_slugs(batch)
+                    bulk_create_with_slugs(batch, pool=pool)
+                    tag_imported(author, batch, tag_names)
+                created += len(batch)
+                # При DEBUG = True журнал запросов рос бы вместе с файлом.
+                reset_queries()
+                if options['verbosity'] > 1:
+                    self.stdout.write(
+                        f'Обработано строк: {created + skipped}'
+                    )
+        elapsed = perf_counter() - started
+        total = created + skipped
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано: {created}, пропущено: {skipped}. '
+            f'{total} строк за {elapsed:.1f} с '
+            f'({total / elapsed if elapsed else total:.0f} строк/с)'
+        ))
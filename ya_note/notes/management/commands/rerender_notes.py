@@ -0,0 +1,77 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from django.db import reset_queries, transaction
+
+from notes.cache import invalidate_note
+from notes.models import Note
+from notes.rendering import RENDERER_VERSION, render_markdown
+from ._batches import batched
+
+
+def render_batch(batch):
+    """Выполняется в отдельном процессе: только рендер, без базы."""
+    return [(pk, render_markdown(text)) for pk, text in batch]
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает HTML заметок, отрендеренных другой версией '
+        'рендера, в пуле процессов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Пересчитать все заметки, а не только устаревшие.'
+        )
+        parser.add_argument('--workers', type=int, default=os.cpu_count())
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def save(self, rendered):
+        notes = Note.objects.only('author_id', 'slug').in_bulk(
+            [pk for pk, _ in rendered]
+        )
+        for pk, html in rendered:
+            if pk in notes:
+                notes[pk].text_html = html
+                notes[pk].html_version = RENDERER_VERSION
+        with transaction.atomic():
+            Note.objects.bulk_update(
+                notes.values(), ('text_html', 'html_version')
+            )
+        # bulk_update не отправляет сигналов, кэш тел сбрасываем сами.
+        for note in notes.values():
+            invalidate_note(note.author_id, note.slug)
+        reset_queries()
+        return len(notes)
+
+    def handle(self, *args, **options):
+        notes = Note.objects.all()
+        if not options['all']:
+            notes = notes.exclude(html_version=RENDERER_VERSION)
+        rows = notes.order_by('pk').values_list('pk', 'text').iterator(
+            chunk_size=options['batch_size']
+        )
+        workers = max(1, options['workers'])
+        saved = 0
+        started = perf_counter()
+        with ProcessPoolExecutor(workers) as executor:
+            # В работе не больше двух пачек на процесс: память не растёт
+            # вместе с числом заметок.
+            pending = set()
+            for batch in batched(rows, options['batch_size']):
+                pending.add(executor.submit(render_batch, batch))
+                if len(pending) >= workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        saved += self.save(future.result())
+            for future in pending:
+                saved += self.save(future.result())
+        elapsed = perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано: {saved} заметок за {elapsed:.1f} с '
+            f'({saved / elapsed if elapsed else saved:.0f} заметок/с)'
+        ))
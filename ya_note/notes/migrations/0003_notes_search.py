@@ -0,0 +1,40 @@
+from django.db import migrations
+
+# Копия notes.search.TABLE: миграция не должна зависеть от кода
+# приложения, который ещё будет меняться.
+TABLE = 'notes_search'
+
+
+def create_search_table(apps, schema_editor):
+    Note = apps.get_model('notes', 'Note')
+    schema_editor.execute(
+        f'CREATE VIRTUAL TABLE {TABLE} USING fts5('
+        "title, text, owner, tokenize='unicode61 remove_diacritics 2', "
+        "prefix='2 3')"
+    )
+    with schema_editor.connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO {TABLE} (rowid, title, text, owner) '
+            'VALUES (%s, %s, %s, %s)',
+            [
+                (pk, title, text, f'u{author_id}')
+                for pk, title, text, author_id in Note.objects.values_list(
+                    'pk', 'title', 'text', 'author_id'
+                ).iterator()
+            ],
+        )
+
+
+def drop_search_table(apps, schema_editor):
+    schema_editor.execute(f'DROP TABLE {TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0002_note_author_id_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_table, drop_search_table),
+    ]
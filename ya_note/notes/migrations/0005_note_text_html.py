@@ -0,0 +1,23 @@
+# Generated by Django 3.2.15 on 2026-10-18 03:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0004_note_revisions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='note',
+            name='html_version',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Версия рендера HTML'),
+        ),
+        migrations.AddField(
+            model_name='note',
+            name='text_html',
+            field=models.TextField(blank=True, editable=False, verbose_name='Текст в HTML'),
+        ),
+    ]
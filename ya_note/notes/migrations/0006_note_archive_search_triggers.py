@@ -0,0 +1,57 @@
+from django.db import migrations, models
+
+# Копия notes.search.TABLE: миграция не должна зависеть от кода
+# приложения, который ещё будет меняться.
+TABLE = 'notes_search'
+
+# Маркеры подсветки (\x02 и \x03) в индекс не попадают.
+TITLE = "replace(replace(new.title, char(2), ''), char(3), '')"
+TEXT = "replace(replace(new.text, char(2), ''), char(3), '')"
+INSERT = (
+    f'INSERT INTO {TABLE} (rowid, title, text, owner) '
+    f"VALUES (new.id, {TITLE}, {TEXT}, 'u' || new.author_id);"
+)
+DELETE = f'DELETE FROM {TABLE} WHERE rowid = old.id;'
+
+# Индекс поиска синхронизируют триггеры, а не сигналы: так его не
+# обходят bulk_create, QuerySet.delete() и update(). SQLite теряет
+# триггеры при пересоздании таблицы, которое Django делает во многих
+# миграциях notes_note, — такие миграции должны создавать их заново.
+CREATE_TRIGGERS = (
+    'CREATE TRIGGER notes_search_insert AFTER INSERT ON notes_note '
+    f'BEGIN {INSERT} END',
+    'CREATE TRIGGER notes_search_update '
+    'AFTER UPDATE OF title, text, author_id ON notes_note '
+    f'BEGIN {DELETE} {INSERT} END',
+    'CREATE TRIGGER notes_search_delete AFTER DELETE ON notes_note '
+    f'BEGIN {DELETE} END',
+)
+DROP_TRIGGERS = (
+    'DROP TRIGGER IF EXISTS notes_search_insert',
+    'DROP TRIGGER IF EXISTS notes_search_update',
+    'DROP TRIGGER IF EXISTS notes_search_delete',
+)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0005_note_text_html'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='note',
+            name='note_author_id_idx',
+        ),
+        migrations.AddField(
+            model_name='note',
+            name='is_archived',
+            field=models.BooleanField(default=False, verbose_name='В архиве'),
+        ),
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['author', 'is_archived', 'id'], name='note_author_archived_id_idx'),
+        ),
+        migrations.RunSQL(CREATE_TRIGGERS, DROP_TRIGGERS),
+    ]
@@ -0,0 +1,94 @@
+# Generated by Django 3.2.15 on 2026-10-18 03:48
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Триггеры поиска из 0006: SQL скопирован, чтобы миграция не менялась
+# вместе с кодом приложения.
+TABLE = 'notes_search'
+TITLE = "replace(replace(new.title, char(2), ''), char(3), '')"
+TEXT = "replace(replace(new.text, char(2), ''), char(3), '')"
+INSERT = (
+    f'INSERT INTO {TABLE} (rowid, title, text, owner) '
+    f"VALUES (new.id, {TITLE}, {TEXT}, 'u' || new.author_id);"
+)
+DELETE = f'DELETE FROM {TABLE} WHERE rowid = old.id;'
+RECREATE_TRIGGERS = (
+    'DROP TRIGGER IF EXISTS notes_search_insert',
+    'DROP TRIGGER IF EXISTS notes_search_update',
+    'DROP TRIGGER IF EXISTS notes_search_delete',
+    'CREATE TRIGGER notes_search_insert AFTER INSERT ON notes_note '
+    f'BEGIN {INSERT} END',
+    'CREATE TRIGGER notes_search_update '
+    'AFTER UPDATE OF title, text, author_id ON notes_note '
+    f'BEGIN {DELETE} {INSERT} END',
+    'CREATE TRIGGER notes_search_delete AFTER DELETE ON notes_note '
+    f'BEGIN {DELETE} END',
+)
+
+# Число заметок с меткой меняется вместе со связями — в том числе при
+# каскадном и массовом удалении, которое не отправляет m2m_changed.
+TAG_COUNT_TRIGGERS = (
+    'CREATE TRIGGER notes_tag_count_insert AFTER INSERT ON notes_notetag '
+    'BEGIN UPDATE notes_tag SET note_count = note_count + 1 '
+    'WHERE id = new.tag_id; END',
+    'CREATE TRIGGER notes_tag_count_delete AFTER DELETE ON notes_notetag '
+    'BEGIN UPDATE notes_tag SET note_count = note_count - 1 '
+    'WHERE id = old.tag_id; END',
+    'CREATE TRIGGER notes_tag_count_update '
+    'AFTER UPDATE OF tag_id ON notes_notetag '
+    'BEGIN UPDATE notes_tag SET note_count = note_count - 1 '
+    'WHERE id = old.tag_id; UPDATE notes_tag '
+    'SET note_count = note_count + 1 WHERE id = new.tag_id; END',
+)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('notes', '0006_note_archive_search_triggers'),
+    ]
+
+    operations = [
+        # При откате AddField снова пересоздаёт notes_note.
+        migrations.RunSQL(migrations.RunSQL.noop, RECREATE_TRIGGERS),
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, verbose_name='Название')),
+                ('note_count', models.PositiveIntegerField(default=0, editable=False, verbose_name='Заметок с меткой')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='note_tags', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ('name',),
+            },
+        ),
+        migrations.CreateModel(
+            name='NoteTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('note', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='notes.note')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='notes.tag')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='note',
+            name='tags',
+            field=models.ManyToManyField(blank=True, related_name='notes', through='notes.NoteTag', to='notes.Tag', verbose_name='Метки'),
+        ),
+        migrations.AddConstraint(
+            model_name='tag',
+            constraint=models.UniqueConstraint(fields=('author', 'name'), name='unique_author_tag'),
+        ),
+        migrations.AddConstraint(
+            model_name='notetag',
+            constraint=models.UniqueConstraint(fields=('tag', 'note'), name='unique_note_tag'),
+        ),
+        # AddField для связи через свою модель пересоздаёт notes_note
+        # в SQLite, а с ней пропадают триггеры поиска.
+        migrations.RunSQL(RECREATE_TRIGGERS, migrations.RunSQL.noop),
+        migrations.RunSQL(TAG_COUNT_TRIGGERS, migrations.RunSQL.noop),
+    ]
@@ -1,7 +1,42 @@
 from django.conf import settings
 from django.db import models
 
-from pytils.translit import slugify
+from .rendering import RENDERER_VERSION, render_markdown
+from .slugs import save_with_slug
+
+# Наибольший id в BigAutoField: больше база не примет.
+MAX_ID = 2 ** 63 - 1
+
+
+class Tag(models.Model):
+    """
+    Метка заметок автора.
+
+    Число заметок с меткой хранится в самой метке и поддерживается
+    триггерами на таблице связей, поэтому списку не нужен COUNT.
+    """
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='note_tags',
+    )
+    name = models.CharField('Название', max_length=50)
+    note_count = models.PositiveIntegerField(
+        'Заметок с меткой',
+        default=0,
+        editable=False,
+    )
+
+    class Meta:
+        ordering = ('name',)
+        constraints = (
+            models.UniqueConstraint(
+                fields=('author', 'name'), name='unique_author_tag'
+            ),
+        )
+
+    def __str__(self):
+        return self.name
 
 
 class Note(models.Model):
@@ -27,12 +62,124 @@ class Note(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
     )
+    tags = models.ManyToManyField(
+        Tag,
+        through='NoteTag',
+        related_name='notes',
+        blank=True,
+        verbose_name='Метки',
+    )
+    is_archived = models.BooleanField(
+        'В архиве',
+        default=False,
+    )
+    text_html = models.TextField(
+        'Текст в HTML',
+        blank=True,
+        editable=False,
+    )
+    html_version = models.PositiveSmallIntegerField(
+        'Версия рендера HTML',
+        default=0,
+        editable=False,
+    )
+
+    class Meta:
+        indexes = (
+            # Список заметок пользователя — отдельно активные и архив —
+            # листается по ключу (author, is_archived, id).
+            models.Index(
+                fields=('author', 'is_archived', 'id'),
+                name='note_author_archived_id_idx',
+            ),
+        )
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """
+        Запоминаем адрес и содержимое из базы.
+
+        Адрес нужен, чтобы сбросить его кэш при смене, содержимое —
+        как исходная версия для истории заметок, у которых её ещё нет.
+        """
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_key = (
+            instance.__dict__.get('author_id'), instance.__dict__.get('slug')
+        )
+        instance._loaded_content = (
+            instance.__dict__.get('title'), instance.__dict__.get('text')
+        )
+        return instance
 
     def __str__(self):
         return self.title
 
+    @property
+    def html(self):
+        """HTML текста; устаревший рендер пересчитывается без сохранения."""
+        if self.html_version != RENDERER_VERSION:
+            return render_markdown(self.text)
+        return self.text_html
+
+    def render_html(self):
+        self.text_html = render_markdown(self.text)
+        self.html_version = RENDERER_VERSION
+
     def save(self, *args, **kwargs):
-        if not self.slug:
-            max_slug_length = self._meta.get_field('slug').max_length
-            self.slug = slugify(self.title)[:max_slug_length]
-        super().save(*args, **kwargs)
+        """Markdown рендерится только при смене текста или рендерера."""
+        loaded_text = getattr(self, '_loaded_content', (None, None))[1]
+        if self.html_version != RENDERER_VERSION or loaded_text != self.text:
+            self.render_html()
+        if self.slug:
+            super().save(*args, **kwargs)
+        else:
+            save_with_slug(
+                self, lambda: super(Note, self).save(*args, **kwargs)
+            )
+        self._loaded_content = (self.title, self.text)
+
+
+class NoteTag(models.Model):
+    """Связь заметки с меткой."""
+    note = models.ForeignKey(Note, on_delete=models.CASCADE)
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE)
+
+    class Meta:
+        constraints = (
+            # Уникальный индекс (tag, note) отдаёт заметки метки сразу
+            # в порядке id — по нему листается отфильтрованный список.
+            models.UniqueConstraint(
+                fields=('tag', 'note'), name='unique_note_tag'
+            ),
+        )
+
+
+class NoteRevision(models.Model):
+    """
+    Версия заметки.
+
+    Каждая NOTES_REVISION_SNAPSHOT_EVERY-я версия хранит текст целиком,
+    остальные — сжатую разницу с предыдущей версией.
+    """
+    note = models.ForeignKey(
+        Note,
+        on_delete=models.CASCADE,
+        related_name='revisions',
+    )
+    number = models.PositiveIntegerField('Номер версии')
+    title = models.CharField('Заголовок', max_length=100)
+    checksum = models.CharField('SHA-1 текста версии', max_length=40)
+    is_snapshot = models.BooleanField('Полный текст', default=False)
+    data = models.BinaryField('Текст или разница с предыдущей версией')
+    created = models.DateTimeField('Сохранена', auto_now_add=True)
+
+    class Meta:
+        ordering = ('-number',)
+        constraints = (
+            models.UniqueConstraint(
+                fields=('note', 'number'), name='unique_note_revision'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.note_id} v{self.number}'
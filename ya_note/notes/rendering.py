@@ -0,0 +1,149 @@
+import re
+from html import escape
+
+# Увеличивается при любом изменении вывода: rerender_notes
+# пересчитывает HTML заметок с другой версией.
+RENDERER_VERSION = 1
+
+FENCE = re.compile(r'^(```|~~~)')
+HEADING = re.compile(r'^(#{1,6})\s+(.*?)\s*#*$')
+BULLET = re.compile(r'^[-*+]\s+(.*)')
+NUMBERED = re.compile(r'^\d{1,9}[.)]\s+(.*)')
+QUOTE = re.compile(r'^>\s?(.*)')
+CODE_SPAN = re.compile(r'`([^`]+)`')
+LINK = re.compile(r'\[([^\]]+)\]\(([^)\s]+)\)')
+STRONG = re.compile(r'\*\*(.+?)\*\*|__(.+?)__')
+EMPHASIS = re.compile(r'\*(.+?)\*|(?<!\w)_(.+?)_(?!\w)')
+PLACEHOLDER = re.compile('\x00(\\d+)\x00')
+SAFE_URL = re.compile(r'^(https?://|mailto:|/|#)', re.IGNORECASE)
+INLINE_MARKUP = re.compile(r'[`\[*_]')
+
+
+def _link(match):
+    text, url = match.groups()
+    if not SAFE_URL.match(url):
+        return text
+    return f'<a href="{url}" rel="nofollow noopener">{text}</a>'
+
+
+def render_inline(text):
+    """
+    Строчная разметка: `код`, ссылки, **жирный** и *курсив*.
+
+    Текст экранируется до разбора, а разметка добавляет только
+    фиксированные теги, поэтому пользовательский HTML не проходит.
+    """
+    text = escape(text)
+    if not INLINE_MARKUP.search(text):
+        return text
+    codes = []
+
+    def stash(match):
+        codes.append(f'<code>{match.group(1)}</code>')
+        return f'\x00{len(codes) - 1}\x00'
+
+    text = CODE_SPAN.sub(stash, text)
+    text = LINK.sub(_link, text)
+    text = STRONG.sub(
+        lambda match: f'<strong>{match.group(1) or match.group(2)}</strong>',
+        text,
+    )
+    text = EMPHASIS.sub(
+        lambda match: f'<em>{match.group(1) or match.group(2)}</em>', text
+    )
+    return PLACEHOLDER.sub(lambda match: codes[int(match.group(1))], text)
+
+
+class _Blocks:
+    """Собирает HTML блоков: абзацы, списки и цитаты между строками."""
+
+    def __init__(self):
+        self.html = []
+        self.paragraph = []
+        self.list_tag = None
+        self.quote = []
+
+    def flush(self):
+        if self.paragraph:
+            text = render_inline('\n'.join(self.paragraph))
+            self.html.append(f'<p>{text}</p>')
+            self.paragraph = []
+        if self.list_tag:
+            self.html.append(f'</{self.list_tag}>')
+            self.list_tag = None
+        if self.quote:
+            inner = render_markdown('\n'.join(self.quote))
+            self.html.append(f'<blockquote>{inner}</blockquote>')
+            self.quote = []
+
+    def code(self, lines):
+        self.html.append(
+            '<pre><code>' + escape('\n'.join(lines)) + '</code></pre>'
+        )
+
+    def item(self, tag, text):
+        if self.list_tag != tag:
+            self.flush()
+            self.html.append(f'<{tag}>')
+            self.list_tag = tag
+        self.html.append(f'<li>{render_inline(text)}</li>')
+
+    def line(self, line):
+        quote = QUOTE.match(line)
+        if quote:
+            if not self.quote:
+                self.flush()
+            self.quote.append(quote.group(1))
+            return
+        if self.quote:
+            self.flush()
+        heading = HEADING.match(line)
+        bullet = BULLET.match(line)
+        numbered = NUMBERED.match(line)
+        if heading:
+            self.flush()
+            level = len(heading.group(1))
+            self.html.append(
+                f'<h{level}>{render_inline(heading.group(2))}</h{level}>'
+            )
+        elif bullet:
+            self.item('ul', bullet.group(1))
+        elif numbered:
+            self.item('ol', numbered.group(1))
+        else:
+            if self.list_tag:
+                self.flush()
+            self.paragraph.append(line)
+
+
+def render_markdown(text):
+    """
+    HTML из подмножества Markdown.
+
+    Поддерживаются заголовки, абзацы, списки, цитаты, блоки кода,
+    `код`, ссылки http(s), mailto и относительные, **жирный**
+    и *курсив*. Всё остальное выводится как экранированный текст.
+    """
+    blocks = _Blocks()
+    fence = None
+    code = []
+    for line in text.replace('\x00', '').splitlines():
+        if fence:
+            if line.startswith(fence):
+                blocks.code(code)
+                fence, code = None, []
+            else:
+                code.append(line)
+            continue
+        opening = FENCE.match(line)
+        if opening:
+            blocks.flush()
+            fence = opening.group(1)
+        elif not line.strip():
+            blocks.flush()
+        else:
+            blocks.line(line)
+    if fence:
+        blocks.code(code)
+    blocks.flush()
+    return '\n'.join(blocks.html)
@@ -0,0 +1,162 @@
+import json
+import zlib
+from difflib import SequenceMatcher
+from hashlib import sha1
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import NoteRevision
+
+
+def _pack(value):
+    return zlib.compress(
+        json.dumps(value, ensure_ascii=False).encode(), zlib.Z_BEST_COMPRESSION
+    )
+
+
+def _unpack(data):
+    return json.loads(zlib.decompress(bytes(data)))
+
+
+def _common_ends(old_lines, new_lines):
+    """Сколько строк совпадает в начале и в конце двух текстов."""
+    limit = min(len(old_lines), len(new_lines))
+    prefix = 0
+    while prefix < limit and old_lines[prefix] == new_lines[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and (
+        old_lines[-1 - suffix] == new_lines[-1 - suffix]
+    ):
+        suffix += 1
+    return prefix, suffix
+
+
+def make_delta(old, new):
+    """
+    Разница двух текстов по строкам.
+
+    Список из пар [начало, конец] — строки, взятые из старого текста,
+    и строк — новый текст. Для большой заметки с небольшой правкой
+    это несколько коротких элементов. Общие начало и конец отрезаются
+    заранее: SequenceMatcher сравнивает только изменённую середину.
+    """
+    old_lines = old.splitlines(keepends=True)
+    new_lines = new.splitlines(keepends=True)
+    prefix, suffix = _common_ends(old_lines, new_lines)
+    delta = [[0, prefix]] if prefix else []
+    matcher = SequenceMatcher(
+        None, old_lines[prefix:len(old_lines) - suffix],
+        new_lines[prefix:len(new_lines) - suffix], autojunk=False,
+    )
+    for tag, old_start, old_end, new_start, new_end in matcher.get_opcodes():
+        if tag == 'equal':
+            delta.append([prefix + old_start, prefix + old_end])
+        elif tag != 'delete':
+            delta.append(''.join(
+                new_lines[prefix + new_start:prefix + new_end]
+            ))
+    if suffix:
+        delta.append([len(old_lines) - suffix, len(old_lines)])
+    return delta
+
+
+def apply_delta(old_lines, delta):
+    """Применяет разницу к списку строк, возвращает новый список строк."""
+    lines = []
+    for part in delta:
+        if isinstance(part, str):
+            lines.extend(part.splitlines(keepends=True))
+        else:
+            lines.extend(old_lines[slice(*part)])
+    return lines
+
+
+def _chain(note, number=None):
+    """
+    Версии от ближайшего полного текста до нужной, по возрастанию.
+
+    Полный текст сохраняется каждые NOTES_REVISION_SNAPSHOT_EVERY
+    версий, поэтому читается не больше стольких строк.
+    """
+    revisions = note.revisions.all()
+    if number is not None:
+        revisions = revisions.filter(number__lte=number)
+    chain = []
+    for revision in revisions[:settings.NOTES_REVISION_SNAPSHOT_EVERY]:
+        chain.append(revision)
+        if revision.is_snapshot:
+            break
+    return chain[::-1]
+
+
+def _text(chain):
+    lines = []
+    for revision in chain:
+        value = _unpack(revision.data)
+        lines = value.splitlines(keepends=True) if revision.is_snapshot else (
+            apply_delta(lines, value)
+        )
+    return ''.join(lines)
+
+
+def checksum(text):
+    return sha1(text.encode()).hexdigest()
+
+
+def get_revision(note, number):
+    """Возвращает пару (заголовок, текст) версии или None."""
+    chain = _chain(note, number)
+    if not chain or chain[-1].number != number:
+        return None
+    return chain[-1].title, _text(chain)
+
+
+def _add(note, number, title, text, previous_text=None):
+    is_snapshot = previous_text is None or (
+        (number - 1) % settings.NOTES_REVISION_SNAPSHOT_EVERY == 0
+    )
+    value = text if is_snapshot else make_delta(previous_text, text)
+    return NoteRevision.objects.create(
+        note=note, number=number, title=title, checksum=checksum(text),
+        is_snapshot=is_snapshot, data=_pack(value),
+    )
+
+
+def _previous_text(note, last):
+    """
+    Текст последней версии.
+
+    Обычно заметка сохраняется после загрузки из базы, и загруженный
+    текст совпадает с последней версией — это проверяет контрольная
+    сумма. Тогда собирать текст из разниц не нужно.
+    """
+    loaded_text = getattr(note, '_loaded_content', (None, None))[1]
+    if loaded_text is not None and checksum(loaded_text) == last.checksum:
+        return loaded_text
+    return _text(_chain(note))
+
+
+def record_revision(note):
+    """
+    Сохраняет текущее состояние заметки новой версией.
+
+    Если заметка менялась в обход истории (например, пришла импортом),
+    первой версией становится её состояние на момент загрузки из базы.
+    Неизменённое содержимое новую версию не создаёт.
+    """
+    with transaction.atomic():
+        last = note.revisions.defer('data').first()
+        if last is not None:
+            number, title = last.number, last.title
+            text = _previous_text(note, last)
+        else:
+            number, title, text = 0, None, None
+            loaded = getattr(note, '_loaded_content', (None, None))
+            if None not in loaded and loaded != (note.title, note.text):
+                number, (title, text) = 1, loaded
+                _add(note, number, title, text)
+        if (title, text) == (note.title, note.text):
+            return None
+        return _add(note, number + 1, note.title, note.text, text)
@@ -0,0 +1,116 @@
+import re
+
+from django.db import connection
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Note
+
+TABLE = 'notes_search'
+WORD = re.compile(r'\w+')
+# Совпадение в заголовке весит больше совпадения в тексте.
+TITLE_WEIGHT = 10
+# Маркеры подсветки, которых не бывает в индексе: триггеры их вырезают.
+# Подсветка ставится до экранирования HTML и заменяется на теги после.
+MARK_START, MARK_END = '\x02', '\x03'
+SNIPPET_TOKENS = 24
+
+# Индекс поиска синхронизируют триггеры, а не сигналы: так его не
+# обходят bulk_create, QuerySet.delete() и update(). Триггеры создают
+# миграции (0006). SQLite теряет их при пересоздании таблицы, которое
+# Django делает во многих миграциях notes_note, — такие миграции должны
+# создавать их заново своей копией SQL (как 0007).
+
+
+def owner_token(author_id):
+    """
+    Автор хранится отдельным словом в индексируемой колонке owner.
+
+    Триггеры индекса собирают то же слово как 'u' || author_id.
+    """
+    return f'u{author_id}'
+
+
+def match_expression(query, author_id):
+    """
+    Запрос FTS5: заметки автора, где встречаются все слова запроса.
+
+    Каждое слово ищется как префикс, поэтому «заме» находит «заметку».
+    Слова ищутся только в заголовке и тексте, не в колонке owner.
+    """
+    words = WORD.findall(query.lower())
+    if not words:
+        return None
+    terms = ' '.join(f'"{word}"*' for word in words)
+    owner = owner_token(author_id)
+    return f'owner : "{owner}" AND {{title text}} : ({terms})'
+
+
+def highlight(value):
+    """Экранирует текст и превращает маркеры в теги <mark>."""
+    value = escape(value)
+    return mark_safe(
+        value.replace(MARK_START, '<mark>').replace(MARK_END, '</mark>')
+    )
+
+
+class SearchHit:
+    """Найденная заметка: slug для ссылки и подсвеченные фрагменты."""
+
+    def __init__(self, pk, slug, title, snippet):
+        self.pk = pk
+        self.slug = slug
+        self.title = highlight(title)
+        self.snippet = highlight(snippet)
+
+
+class SearchResults:
+    """
+    Ленивый результат поиска по заметкам одного автора.
+
+    Понимает Paginator: считает совпадения и загружает только
+    заметки нужной страницы вместе с подсветкой.
+    """
+
+    def __init__(self, query, author_id):
+        self.author_id = author_id
+        self.match = match_expression(query, author_id)
+        self._count = None
+
+    def count(self):
+        if self._count is None:
+            self._count = self._count_matches() if self.match else 0
+        return self._count
+
+    def _count_matches(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT count(*) FROM {TABLE} WHERE {TABLE} MATCH %s',
+                [self.match],
+            )
+            return cursor.fetchone()[0]
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key:key + 1][0]
+        if not self.match:
+            return []
+        offset = key.start or 0
+        limit = (key.stop if key.stop is not None else self.count()) - offset
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT note.id, note.slug, '
+                f"highlight({TABLE}, 0, %s, %s), "
+                f"snippet({TABLE}, 1, %s, %s, '…', {SNIPPET_TOKENS}) "
+                f'FROM {TABLE} JOIN {Note._meta.db_table} AS note '
+                f'ON note.id = {TABLE}.rowid '
+                f'WHERE {TABLE} MATCH %s AND note.author_id = %s '
+                f'ORDER BY bm25({TABLE}, {TITLE_WEIGHT}, 1, 0) '
+                'LIMIT %s OFFSET %s',
+                [MARK_START, MARK_END, MARK_START, MARK_END,
+                 self.match, self.author_id, limit, offset],
+            )
+            return [SearchHit(*row) for row in cursor.fetchall()]
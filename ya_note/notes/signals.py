@@ -0,0 +1,46 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from yanote.auth import forget_user
+from .cache import invalidate_note
+from .models import Note
+from .revisions import record_revision
+
+
+@receiver(post_save, sender=Note)
+def save_revision(sender, instance, raw=False, **kwargs):
+    if not raw:
+        record_revision(instance)
+
+
+@receiver(post_save, sender=Note)
+@receiver(post_delete, sender=Note)
+def reset_note_cache(sender, instance, **kwargs):
+    """Сбрасывает кэш по новому адресу заметки и по прежнему, если он был."""
+    keys = {(instance.author_id, instance.slug)}
+    loaded_key = getattr(instance, '_loaded_key', None)
+    if loaded_key is not None and None not in loaded_key:
+        keys.add(loaded_key)
+    for author_id, slug in keys:
+        invalidate_note(author_id, slug)
+    instance._loaded_key = (instance.author_id, instance.slug)
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def reset_cached_user(sender, instance, **kwargs):
+    """Сбрасывает пользователя в кэше сессий, см. yanote/auth.py."""
+    forget_user(instance.pk)
+
+
+@receiver(connection_created)
+def tune_sqlite(sender, connection, **kwargs):
+    """Применяет SQLITE_PRAGMAS к каждому новому соединению с SQLite."""
+    if connection.vendor != 'sqlite' or not settings.SQLITE_PRAGMAS:
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
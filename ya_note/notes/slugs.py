@@ -0,0 +1,178 @@
+import re
+from functools import lru_cache
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from pytils.translit import slugify
+
+# Сколько разных заголовков помнит кэш транслитерации.
+SLUG_CACHE_SIZE = 4096
+
+# Сколько символов оставляем под суффикс вида «-12345».
+SUFFIX_RESERVE = 6
+# Сколько основ проверяем одним запросом при массовом создании.
+BULK_CHUNK_SIZE = 200
+ATTEMPTS = 5
+
+
+AMPERSAND = re.compile(r'&amp;|&')
+SEPARATORS = re.compile(r'[-\s]+')
+NOT_SLUG = re.compile(r'[^a-z0-9-]')
+
+
+def _ascii_slugify(title):
+    """То же, что pytils slugify, но без таблицы транслитерации.
+
+    Для латиницы pytils оставляет буквы, цифры и дефисы —
+    всё остальное выбрасывает.
+    """
+    title = SEPARATORS.sub('-', AMPERSAND.sub(' and ', title.lower()))
+    return NOT_SLUG.sub('', title)
+
+
+@lru_cache(maxsize=SLUG_CACHE_SIZE)
+def make_slug(title):
+    """Slug из заголовка; общий для формы, модели и массового импорта."""
+    if title.isascii():
+        return _ascii_slugify(title)
+    return slugify(title)
+
+
+def base_slug(title, max_length):
+    """Slug из заголовка, обрезанный до длины поля."""
+    return make_slug(title)[:max_length]
+
+
+def _stem(base, max_length):
+    """Часть slug, к которой дописывается суффикс."""
+    return base[:max_length - SUFFIX_RESERVE]
+
+
+def _lookup(base, max_length):
+    """Условие на сам slug и все его варианты с суффиксом.
+
+    Диапазон вместо startswith: сравнение по индексу, без LIKE.
+    Символ «.» идёт в таблице сразу за «-».
+    """
+    stem = _stem(base, max_length)
+    return Q(slug=base) | Q(slug__gt=stem + '-', slug__lt=stem + '.')
+
+
+class SlugPool:
+    """
+    Занятые slug и наибольший номер суффикса для каждой основы.
+
+    Основа читается из базы один раз, дальше slug раздаются в памяти:
+    так пачки импорта не перечитывают уже известные заметки.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.max_length = model._meta.get_field('slug').max_length
+        self.reset()
+
+    def reset(self):
+        self.taken = set()
+        self.numbers = {}
+        self.loaded = set()
+
+    def add(self, slug):
+        self.taken.add(slug)
+        stem, _, number = slug.rpartition('-')
+        if number.isdigit():
+            self.numbers[stem] = max(self.numbers.get(stem, 1), int(number))
+
+    def load(self, bases, exclude_pk=None):
+        """Читает занятые slug для новых основ: запрос на BULK_CHUNK_SIZE."""
+        bases = [base for base in set(bases) if base not in self.loaded]
+        for start in range(0, len(bases), BULK_CHUNK_SIZE):
+            lookup = Q()
+            for base in bases[start:start + BULK_CHUNK_SIZE]:
+                lookup |= _lookup(base, self.max_length)
+            taken = self.model.objects.filter(lookup)
+            if exclude_pk is not None:
+                taken = taken.exclude(pk=exclude_pk)
+            for slug in taken.values_list('slug', flat=True):
+                self.add(slug)
+        self.loaded.update(bases)
+
+    def pick(self, base):
+        """Занимает свободный slug: base, base-2, base-3…"""
+        slug = base
+        if slug in self.taken:
+            stem = _stem(base, self.max_length)
+            number = self.numbers.get(stem, 1) + 1
+            slug = f'{stem}-{number}'
+            while slug in self.taken:
+                number += 1
+                slug = f'{stem}-{number}'
+        self.add(slug)
+        return slug
+
+
+def next_free_slug(model, base, exclude_pk=None):
+    """Свободный slug для одной записи за один запрос к базе."""
+    pool = SlugPool(model)
+    pool.load([base], exclude_pk)
+    return pool.pick(base)
+
+
+def save_with_slug(instance, save):
+    """Сохраняет запись с автоматическим slug.
+
+    Если между выбором slug и вставкой его занял параллельный запрос,
+    база ответит IntegrityError — тогда выбираем slug заново.
+    """
+    model = type(instance)
+    max_length = model._meta.get_field('slug').max_length
+    base = base_slug(instance.title, max_length)
+    for attempt in range(ATTEMPTS):
+        instance.slug = next_free_slug(model, base, instance.pk)
+        try:
+            with transaction.atomic():
+                return save()
+        except IntegrityError:
+            if attempt == ATTEMPTS - 1:
+                raise
+
+
+def assign_slugs(notes, pool=None):
+    """Проставляет уникальные slug пачке новых заметок без slug.
+
+    Занятые slug читаются одним запросом на BULK_CHUNK_SIZE разных основ,
+    дальше суффиксы раздаются в памяти. Общий pool позволяет не
+    перечитывать основы в следующих пачках.
+    """
+    if not notes:
+        return notes
+    pool = pool or SlugPool(type(notes[0]))
+    pending = [note for note in notes if not note.slug]
+    for note in notes:
+        if note.slug:
+            pool.add(note.slug)
+    bases = [base_slug(note.title, pool.max_length) for note in pending]
+    pool.load(bases)
+    for note, base in zip(pending, bases):
+        note.slug = pool.pick(base)
+    return notes
+
+
+def bulk_create_with_slugs(notes, batch_size=None, pool=None):
+    """Создаёт заметки пачкой, повторяя раздачу slug при гонке."""
+    if not notes:
+        return []
+    pool = pool or SlugPool(type(notes[0]))
+    auto = [note for note in notes if not note.slug]
+    for attempt in range(ATTEMPTS):
+        try:
+            with transaction.atomic():
+                return type(notes[0]).objects.bulk_create(
+                    assign_slugs(notes, pool), batch_size=batch_size
+                )
+        except IntegrityError:
+            if attempt == ATTEMPTS - 1:
+                raise
+            # Кто-то занял slug параллельно: перечитываем всё заново.
+            pool.reset()
+            for note in auto:
+                note.slug = ''
@@ -0,0 +1,40 @@
+from .models import NoteTag, Tag
+
+SEPARATOR = ','
+
+
+def parse_tag_names(value):
+    """Названия меток из строки «работа, идеи»: без пустых и повторов."""
+    names = (name.strip() for name in value.split(SEPARATOR))
+    return list(dict.fromkeys(name for name in names if name))
+
+
+def get_tags(author, names):
+    """Метки автора с этими названиями; недостающие создаются."""
+    if not names:
+        return []
+    Tag.objects.bulk_create(
+        [Tag(author=author, name=name) for name in names],
+        ignore_conflicts=True,
+    )
+    return list(Tag.objects.filter(author=author, name__in=names))
+
+
+def tag_notes(notes, tag):
+    """
+    Ставит метку заметкам, уже отмеченные пропускаются.
+
+    Читаются только id заметок; связи вставляются пачками INSERT,
+    число заметок у метки пересчитывают триггеры.
+    """
+    ids = list(notes.values_list('pk', flat=True))
+    NoteTag.objects.bulk_create(
+        [NoteTag(note_id=pk, tag=tag) for pk in ids],
+        ignore_conflicts=True,
+    )
+    return len(ids)
+
+
+def untag_notes(notes, tag):
+    """Снимает метку одним DELETE, возвращает число снятых связей."""
+    return NoteTag.objects.filter(tag=tag, note__in=notes).delete()[0]
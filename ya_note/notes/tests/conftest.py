@@ -0,0 +1,9 @@
+import pytest
+from django.core.cache import caches
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Кэш живёт между тестами, а id в откатанных транзакциях повторяются."""
+    for cache in caches.all():
+        cache.clear()
@@ -2,25 +2,27 @@ from http import HTTPStatus
 
 from django.urls import reverse
 from django.contrib.auth.models import User
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
-from notes.models import Note
+from notes.models import Note, Tag
 
 
 class YaNoteContentTests(TestCase):
-    def setUp(self):
-        self.user_one = User.objects.create_user(username='user1',
-                                                 password='testpass123')
-        self.user_two = User.objects.create_user(username='user2',
-                                                 password='testpass123')
-
-        self.note_by_user_one = Note.objects.create(title='Note 1',
-                                                    text='Content 1',
-                                                    author=self.user_one)
-        self.note_by_user_two = Note.objects.create(title='Note 2',
-                                                    text='Content 2',
-                                                    author=self.user_two)
+    @classmethod
+    def setUpTestData(cls):
+        cls.user_one = User.objects.create_user(username='user1',
+                                                password='testpass123')
+        cls.user_two = User.objects.create_user(username='user2',
+                                                password='testpass123')
+
+        cls.note_by_user_one = Note.objects.create(title='Note 1',
+                                                   text='Content 1',
+                                                   author=cls.user_one)
+        cls.note_by_user_two = Note.objects.create(title='Note 2',
+                                                   text='Content 2',
+                                                   author=cls.user_two)
 
+    def setUp(self):
         self.client.login(username='user1', password='testpass123')
 
         self.list_url = reverse('notes:list')
@@ -54,3 +56,98 @@ class YaNoteContentTests(TestCase):
         response = self.client.get(self.edit_url)
         self.assertEqual(response.status_code, HTTPStatus.OK)
         self.assertTrue('form' in response.context)
+
+    @override_settings(NOTES_COUNT_ON_LIST_PAGE=2)
+    def test_list_is_paginated_by_id(self):
+        notes = [self.note_by_user_one] + [
+            Note.objects.create(title=f'Note {number}', text='Content',
+                                author=self.user_one)
+            for number in range(3, 6)
+        ]
+        response = self.client.get(self.list_url)
+        self.assertEqual(list(response.context['object_list']), notes[:2])
+        self.assertEqual(response.context['next_after'], notes[1].id)
+        self.assertNotIn('text', response.context['object_list'][0].__dict__)
+        response = self.client.get(
+            self.list_url, {'after': response.context['next_after']}
+        )
+        self.assertEqual(list(response.context['object_list']), notes[2:])
+        self.assertIsNone(response.context['next_after'])
+
+    @override_settings(NOTES_COUNT_ON_LIST_PAGE=2)
+    def test_list_is_filtered_by_tag(self):
+        tag = Tag.objects.create(author=self.user_one, name='идеи')
+        notes = [
+            Note.objects.create(title=f'Note {number}', text='Content',
+                                author=self.user_one)
+            for number in range(3, 7)
+        ]
+        tagged = notes[::2] + [notes[3]]
+        tag.notes.add(*tagged)
+        response = self.client.get(self.list_url, {'tag': 'идеи'})
+        self.assertEqual(list(response.context['object_list']), tagged[:2])
+        self.assertEqual(list(response.context['tags']), [tag])
+        self.assertEqual(response.context['tags'][0].note_count, 3)
+        response = self.client.get(self.list_url, {
+            'tag': 'идеи', 'after': response.context['next_after']
+        })
+        self.assertEqual(list(response.context['object_list']), tagged[2:])
+        self.client.force_login(self.user_two)
+        response = self.client.get(self.list_url, {'tag': 'идеи'})
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_list_bad_cursor_is_not_found(self):
+        for after in ('abc', '²', '9' * 30):
+            with self.subTest(after=after):
+                response = self.client.get(self.list_url, {'after': after})
+                self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_search_finds_own_notes_by_prefix(self):
+        Note.objects.create(title='Заметка про <b>котов</b>',
+                            text='Кошки спят', author=self.user_one)
+        Note.objects.create(title='Чужие коты', text='Кошки',
+                            author=self.user_two)
+        response = self.client.get(reverse('notes:search'), {'q': 'кот'})
+        hits = list(response.context['object_list'])
+        self.assertEqual(len(hits), 1)
+        self.assertEqual(
+            hits[0].title,
+            'Заметка про &lt;b&gt;<mark>котов</mark>&lt;/b&gt;'
+        )
+
+    def test_search_index_follows_edits_and_deletes(self):
+        search_url = reverse('notes:search')
+        self.note_by_user_one.title = 'Переименованная'
+        self.note_by_user_one.save()
+        response = self.client.get(search_url, {'q': 'переим'})
+        self.assertEqual(len(response.context['object_list']), 1)
+        self.note_by_user_one.delete()
+        response = self.client.get(search_url, {'q': 'переим'})
+        self.assertEqual(len(response.context['object_list']), 0)
+
+    def test_detail_is_served_from_cache(self):
+        detail_url = reverse('notes:detail',
+                             args=[self.note_by_user_one.slug])
+        self.client.get(detail_url)
+        with self.assertNumQueries(2):
+            # Только сессия и пользователь, заметка берётся из кэша.
+            response = self.client.get(detail_url)
+        self.assertContains(response, self.note_by_user_one.text)
+
+    def test_renamed_slug_never_serves_stale_content(self):
+        old_slug = self.note_by_user_one.slug
+        old_url = reverse('notes:detail', args=[old_slug])
+        self.client.get(old_url)
+        self.client.post(self.edit_url, {
+            'title': 'Новое название', 'text': 'Новый текст',
+            'slug': 'renamed',
+        })
+        response = self.client.get(old_url)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        response = self.client.get(reverse('notes:detail', args=['renamed']))
+        self.assertContains(response, 'Новый текст')
+        Note.objects.create(title='Другая', text='Другой текст',
+                            slug=old_slug, author=self.user_one)
+        response = self.client.get(old_url)
+        self.assertContains(response, 'Другой текст')
+        self.assertNotContains(response, 'Content 1')
@@ -1,38 +1,60 @@
+import json
 from http import HTTPStatus
+from io import StringIO
+from unittest import mock
 
-from django.test import TestCase
+from django.contrib.auth import SESSION_KEY
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.contrib.auth.models import User
 from pytils.translit import slugify
 
-from notes.models import Note
+from notes import slugs
+from notes.models import Note, NoteRevision, Tag
+from notes.rendering import RENDERER_VERSION, render_markdown
+from notes.revisions import get_revision
+from notes.search import SearchResults
+from yanote.sessions import SessionStore
+
+CACHED_SESSIONS = {
+    'SESSION_ENGINE': 'yanote.sessions',
+    'AUTHENTICATION_BACKENDS': ['yanote.auth.CachedModelBackend'],
+}
 
 
 class YaNoteLogicTests(TestCase):
-    def setUp(self):
-        self.username = 'testuser'
-        self.password = 'testpass123'
-        self.user = User.objects.create_user(username=self.username,
-                                             password=self.password)
-        self.client.login(username=self.username, password=self.password)
-        self.add_url = reverse('notes:add')
+    @classmethod
+    def setUpTestData(cls):
+        cls.username = 'testuser'
+        cls.password = 'testpass123'
+        cls.user = User.objects.create_user(username=cls.username,
+                                            password=cls.password)
 
-        self.other_username = 'otheruser'
-        self.other_password = 'otherpass123'
-        self.other_user = User.objects.create_user(
-            username=self.other_username, password=self.other_password)
+        cls.other_username = 'otheruser'
+        cls.other_password = 'otherpass123'
+        cls.other_user = User.objects.create_user(
+            username=cls.other_username, password=cls.other_password)
 
-        self.note_title = 'Note for Editing'
-        self.note_text = 'Content for Editing'
-        self.note = Note.objects.create(title=self.note_title,
-                                        text=self.note_text, author=self.user)
+        cls.note_title = 'Note for Editing'
+        cls.note_text = 'Content for Editing'
+        cls.note = Note.objects.create(title=cls.note_title,
+                                       text=cls.note_text, author=cls.user)
 
-        self.other_note_title = 'Note for Editing by Other'
-        self.other_note_text = 'Content for Editing by Other'
-        self.other_note = Note.objects.create(
-            title=self.other_note_title,
-            text=self.other_note_text,
-            author=self.other_user)
+        cls.other_note_title = 'Note for Editing by Other'
+        cls.other_note_text = 'Content for Editing by Other'
+        cls.other_note = Note.objects.create(
+            title=cls.other_note_title,
+            text=cls.other_note_text,
+            author=cls.other_user)
+
+    def setUp(self):
+        self.client.login(username=self.username, password=self.password)
+        self.add_url = reverse('notes:add')
 
     def test_logged_in_user_can_create_note(self):
         note_count = Note.objects.count()
@@ -134,6 +156,60 @@ class YaNoteLogicTests(TestCase):
         note = Note.objects.filter(title=test_title).last()
         self.assertEqual(note.slug, slugify(note.title))
 
+    def test_colliding_title_gets_next_suffix(self):
+        base = slugify(self.note_title)
+        Note.objects.create(title='x', text='x', author=self.user,
+                            slug=f'{base}-7')
+        Note.objects.create(title='x', text='x', author=self.user,
+                            slug=f'{base}-draft')
+        response = self.client.post(
+            self.add_url, {'title': self.note_title, 'text': 'Text'}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        self.assertEqual(Note.objects.last().slug, f'{base}-8')
+
+    def test_slug_allocation_takes_one_query(self):
+        with self.assertNumQueries(1):
+            slug = slugs.next_free_slug(Note, self.note.slug)
+        self.assertEqual(slug, f'{self.note.slug}-2')
+
+    def test_slug_allocation_retries_on_integrity_error(self):
+        real_next_free_slug = slugs.next_free_slug
+        answers = iter([self.note.slug])
+
+        def stale_then_real(model, base, exclude_pk=None):
+            return next(answers, None) or real_next_free_slug(
+                model, base, exclude_pk)
+
+        with mock.patch.object(slugs, 'next_free_slug', stale_then_real):
+            note = Note.objects.create(title=self.note_title, text='Text',
+                                       author=self.user)
+        self.assertEqual(note.slug, f'{self.note.slug}-2')
+
+    def test_bulk_create_assigns_unique_slugs(self):
+        notes = [
+            Note(title=self.note_title, text=str(number), author=self.user)
+            for number in range(1000)
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            slugs.bulk_create_with_slugs(notes, batch_size=500)
+        selects = [query for query in queries
+                   if query['sql'].startswith('SELECT')]
+        self.assertEqual(len(selects), 1)
+        created = Note.objects.filter(author=self.user).values_list(
+            'slug', flat=True)
+        self.assertEqual(len(set(created)), 1001)
+        self.assertIn(f'{self.note.slug}-1001', created)
+
+    def test_make_slug_matches_pytils(self):
+        titles = ('Заметка № 1', 'Tom & Jerry', "Don't  panic -- now",
+                  'Ёлка_2024!', '  ')
+        for title in titles:
+            with self.subTest(title=title):
+                self.assertEqual(slugs.make_slug(title), slugify(title))
+        self.assertEqual(slugs.make_slug.cache_info().maxsize,
+                         slugs.SLUG_CACHE_SIZE)
+
     def test_user_can_edit_own_note(self):
         new_title = 'Updated Note'
         new_text = 'Updated Content'
@@ -174,3 +250,303 @@ class YaNoteLogicTests(TestCase):
         response = self.client.post(delete_url)
         self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
         self.assertTrue(Note.objects.filter(pk=self.other_note.pk).exists())
+
+    def test_import_and_export_notes(self):
+        lines = [
+            {'title': 'Импорт', 'text': 'Первая'},
+            {'title': 'Импорт', 'text': 'Вторая'},
+            {'title': 'Свой адрес', 'text': 'Текст', 'slug': 'own-slug'},
+            {'title': 'Занятый адрес', 'text': 'Текст',
+             'slug': self.note.slug},
+            {'title': 'Без текста'},
+        ]
+        stdin = StringIO(''.join(
+            json.dumps(line, ensure_ascii=False) + '\n' for line in lines
+        ))
+        with mock.patch('sys.stdin', stdin):
+            call_command('import_notes', self.other_username,
+                         batch_size=2, stdout=StringIO())
+        imported = Note.objects.filter(author=self.other_user).exclude(
+            pk=self.other_note.pk
+        ).order_by('id')
+        self.assertEqual(
+            list(imported.values_list('slug', flat=True)),
+            ['import', 'import-2', 'own-slug', 'zanyatyij-adres'],
+        )
+        self.assertEqual(
+            SearchResults('импорт', self.other_user.pk).count(), 2
+        )
+        stdout = StringIO()
+        call_command('export_notes', self.other_username,
+                     stdout=stdout, stderr=StringIO())
+        exported = [json.loads(line)
+                    for line in stdout.getvalue().splitlines()]
+        self.assertEqual(len(exported), 5)
+        self.assertEqual(exported[1], {
+            'title': 'Импорт', 'text': 'Первая', 'slug': 'import',
+            'is_archived': False, 'tags': [],
+        })
+
+    def test_export_and_import_keep_archive_and_tags(self):
+        self.other_note.is_archived = True
+        self.other_note.save()
+        self.other_note.tags.set([
+            Tag.objects.create(author=self.other_user, name=name)
+            for name in ('работа', 'идеи')
+        ])
+        stdout = StringIO()
+        call_command('export_notes', self.other_username,
+                     stdout=stdout, stderr=StringIO())
+        Note.objects.filter(author=self.other_user).delete()
+        with mock.patch('sys.stdin', StringIO(stdout.getvalue())):
+            call_command('import_notes', self.other_username,
+                         stdout=StringIO())
+        note = Note.objects.get(author=self.other_user)
+        self.assertTrue(note.is_archived)
+        self.assertEqual(
+            sorted(note.tags.values_list('name', flat=True)),
+            ['идеи', 'работа'],
+        )
+        self.assertEqual(
+            Tag.objects.get(author=self.other_user, name='идеи').note_count,
+            1,
+        )
+
+    def test_import_skips_malformed_rows(self):
+        lines = [['x'], 'x', None, {'title': 5}, {'title': 5, 'text': 7}]
+        stdin = StringIO(''.join(json.dumps(line) + '\n' for line in lines))
+        stdout = StringIO()
+        with mock.patch('sys.stdin', stdin):
+            call_command('import_notes', self.other_username,
+                         batch_size=2, stdout=stdout)
+        self.assertIn('Создано: 1, пропущено: 4.', stdout.getvalue())
+        self.assertTrue(Note.objects.filter(
+            author=self.other_user, title='5', text='7'
+        ).exists())
+
+    @override_settings(NOTES_REVISION_SNAPSHOT_EVERY=3)
+    def test_every_revision_can_be_rebuilt(self):
+        lines = [f'Строка {number}\n' for number in range(1000)]
+        texts = [self.note_text]
+        for number in range(7):
+            lines[number * 100] = f'Правка {number}\n'
+            texts.append(''.join(lines))
+            self.note.text = texts[-1]
+            self.note.save()
+        revisions = list(self.note.revisions.order_by('number'))
+        self.assertEqual(
+            [revision.is_snapshot for revision in revisions],
+            [True, False, False, True, False, False, True, False],
+        )
+        self.assertLess(len(revisions[-1].data), 100)
+        for number, text in enumerate(texts, start=1):
+            self.assertEqual(get_revision(self.note, number),
+                             (self.note_title, text))
+
+    def test_user_can_restore_own_revision(self):
+        self.client.post(reverse('notes:edit', args=[self.note.slug]), {
+            'title': 'Updated Note', 'text': 'Updated Content',
+            'slug': self.note.slug,
+        })
+        restore_url = reverse('notes:restore', args=[self.note.slug, 1])
+        response = self.client.post(restore_url)
+        self.assertRedirects(
+            response, reverse('notes:history', args=[self.note.slug])
+        )
+        self.note.refresh_from_db()
+        self.assertEqual(self.note.title, self.note_title)
+        self.assertEqual(self.note.text, self.note_text)
+        self.assertEqual(self.note.revisions.count(), 3)
+        other_restore_url = reverse(
+            'notes:restore', args=[self.other_note.slug, 1]
+        )
+        response = self.client.post(other_restore_url)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        self.assertEqual(
+            NoteRevision.objects.filter(note=self.other_note).count(), 1
+        )
+
+    def test_markdown_is_rendered_safely(self):
+        html = render_markdown(
+            '# Заголовок\n\n**жирный** и [ссылка](https://ya.ru)\n'
+            '[плохая](javascript:alert)\n\n- пункт\n\n<script>x</script>'
+        )
+        self.assertEqual(html, (
+            '<h1>Заголовок</h1>\n'
+            '<p><strong>жирный</strong> и '
+            '<a href="https://ya.ru" rel="nofollow noopener">ссылка</a>\n'
+            'плохая</p>\n'
+            '<ul>\n<li>пункт</li>\n</ul>\n'
+            '<p>&lt;script&gt;x&lt;/script&gt;</p>'
+        ))
+
+    def test_html_is_rendered_only_when_text_changes(self):
+        self.assertEqual(self.note.text_html, f'<p>{self.note_text}</p>')
+        note = Note.objects.get(pk=self.note.pk)
+        with mock.patch('notes.models.render_markdown') as render:
+            note.title = 'Новое название'
+            note.save()
+        render.assert_not_called()
+        note.text = '*Новый* текст'
+        note.save()
+        note.refresh_from_db()
+        self.assertEqual(note.text_html, '<p><em>Новый</em> текст</p>')
+
+    def test_rerender_notes_rebuilds_stale_html(self):
+        Note.objects.update(text_html='', html_version=0)
+        call_command('rerender_notes', workers=2, stdout=StringIO())
+        for note in Note.objects.all():
+            self.assertEqual(note.html_version, RENDERER_VERSION)
+            self.assertEqual(note.text_html, render_markdown(note.text))
+
+    def bulk(self, **data):
+        return self.client.post(reverse('notes:bulk'), data)
+
+    def test_bulk_actions_touch_only_own_notes(self):
+        ids = [self.note.pk, self.other_note.pk]
+        response = self.bulk(action='archive', ids=ids)
+        self.assertRedirects(response, reverse('notes:list'))
+        self.note.refresh_from_db()
+        self.other_note.refresh_from_db()
+        self.assertTrue(self.note.is_archived)
+        self.assertFalse(self.other_note.is_archived)
+        self.bulk(action='delete', select_all=True, archived=True)
+        self.bulk(action='delete', ids=ids)
+        self.assertFalse(Note.objects.filter(pk=self.note.pk).exists())
+        self.assertTrue(Note.objects.filter(pk=self.other_note.pk).exists())
+        response = self.bulk(action='delete')
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        response = self.bulk(action='delete', ids=['9' * 23])
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_bulk_delete_query_count_does_not_grow(self):
+        for count in (2, 40):
+            with self.subTest(count=count):
+                notes = slugs.bulk_create_with_slugs([
+                    Note(title='Пачка', text='Текст', author=self.user)
+                    for _ in range(count)
+                ])
+                ids = list(Note.objects.filter(
+                    slug__in=[note.slug for note in notes]
+                ).values_list('pk', flat=True))
+                # Сессия, пользователь, выборка заметок для сигналов,
+                # удаление меток, версий и самих заметок.
+                with self.assertNumQueries(6):
+                    self.bulk(action='delete', ids=ids)
+                self.assertFalse(Note.objects.filter(pk__in=ids).exists())
+                self.assertEqual(
+                    SearchResults('пачка', self.user.pk).count(), 0
+                )
+
+    def test_search_triggers_survive_migrations(self):
+        # SQLite теряет триггеры, когда миграция пересоздаёт таблицу.
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger' "
+                "AND tbl_name = 'notes_note' ORDER BY name"
+            )
+            triggers = [name for name, in cursor.fetchall()]
+        self.assertEqual(triggers, [
+            'notes_search_delete', 'notes_search_insert',
+            'notes_search_update',
+        ])
+
+    def tag_counts(self):
+        return dict(Tag.objects.values_list('name', 'note_count'))
+
+    def test_tags_are_saved_from_form(self):
+        url = reverse('notes:edit', args=[self.note.slug])
+        data = {'title': self.note_title, 'text': self.note_text,
+                'slug': self.note.slug, 'tag_names': 'работа, идеи, работа'}
+        self.client.post(url, data)
+        self.assertEqual(
+            sorted(self.note.tags.values_list('name', flat=True)),
+            ['идеи', 'работа'],
+        )
+        response = self.client.get(url)
+        self.assertEqual(
+            response.context['form'].initial['tag_names'], 'идеи, работа'
+        )
+        self.client.post(url, {**data, 'tag_names': 'идеи'})
+        self.assertEqual(self.tag_counts(), {'идеи': 1, 'работа': 0})
+
+    def test_tag_counts_follow_links(self):
+        self.bulk(action='tag', tag='общая',
+                  ids=[self.note.pk, self.other_note.pk])
+        # Метка ставится только своим заметкам и только своей меткой.
+        self.assertEqual(
+            list(Tag.objects.values_list('author', 'note_count')),
+            [(self.user.pk, 1)],
+        )
+        notes = slugs.bulk_create_with_slugs([
+            Note(title='Пачка', text='Текст', author=self.user)
+            for _ in range(5)
+        ])
+        self.bulk(action='tag', tag='общая', select_all=True)
+        self.assertEqual(self.tag_counts(), {'общая': 6})
+        self.bulk(action='untag', tag='общая', ids=[self.note.pk])
+        self.assertEqual(self.tag_counts(), {'общая': 5})
+        Note.objects.get(slug=notes[0].slug).delete()
+        self.bulk(action='delete', ids=list(Note.objects.filter(
+            slug__in=[note.slug for note in notes[1:3]]
+        ).values_list('pk', flat=True)))
+        self.assertEqual(self.tag_counts(), {'общая': 2})
+        response = self.bulk(action='tag', ids=[self.note.pk])
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_tag_counts_triggers_survive_migrations(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger' "
+                "AND tbl_name = 'notes_notetag' ORDER BY name"
+            )
+            triggers = [name for name, in cursor.fetchall()]
+        self.assertEqual(triggers, [
+            'notes_tag_count_delete', 'notes_tag_count_insert',
+            'notes_tag_count_update',
+        ])
+
+    def test_new_connections_get_sqlite_pragmas(self):
+        pragmas = {'cache_size': -1234, 'busy_timeout': 4321}
+        new_connection = connection.copy()
+        try:
+            with override_settings(SQLITE_PRAGMAS=pragmas), \
+                    new_connection.cursor() as cursor:
+                for name, value in pragmas.items():
+                    cursor.execute(f'PRAGMA {name}')
+                    self.assertEqual(cursor.fetchone()[0], value)
+        finally:
+            new_connection.close()
+
+    @override_settings(**CACHED_SESSIONS)
+    def test_cached_sessions_skip_auth_queries(self):
+        self.client.force_login(self.user)
+        url = reverse('notes:list')
+        self.client.get(url)
+        # Заметки и теги; сессия и пользователь в кэше.
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual(response.context['user'], self.user)
+        self.user.set_password('newpass123')
+        self.user.save()
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+
+    @override_settings(**CACHED_SESSIONS)
+    def test_cached_sessions_write_behind(self):
+        session = SessionStore()
+        session['visits'] = 1
+        session.save()
+        session['visits'] = 2
+        session.save()
+        stored = Session.objects.get(pk=session.session_key)
+        self.assertEqual(stored.get_decoded(), {'visits': 1})
+        self.assertEqual(SessionStore(session.session_key)['visits'], 2)
+        session[SESSION_KEY] = str(self.user.pk)
+        session.save()
+        stored = Session.objects.get(pk=session.session_key)
+        self.assertEqual(stored.get_decoded()[SESSION_KEY], str(self.user.pk))
+        cache.clear()
+        self.assertEqual(
+            SessionStore(session.session_key)[SESSION_KEY], str(self.user.pk)
+        )
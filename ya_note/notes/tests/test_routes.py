@@ -18,19 +18,22 @@ def generate_unique_slug(title):
 
 
 class RouteTests(TestCase):
-    def setUp(self):
-        self.client = Client()
-        self.user = User.objects.create_user(
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
             username='testuser',
             email='test@example.com',
             password='testpass'
         )
-        self.client.force_login(self.user)
         title = "Test Note"
-        self.slug = generate_unique_slug(title)
-        self.note = Note.objects.create(title=title,
-                                        text="This is a test note.",
-                                        author=self.user, slug=self.slug)
+        cls.slug = generate_unique_slug(title)
+        cls.note = Note.objects.create(title=title,
+                                       text="This is a test note.",
+                                       author=cls.user, slug=cls.slug)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
         self.urls = {
             'home': reverse('notes:home'),
             'list': reverse('notes:list'),
@@ -10,6 +10,12 @@ urlpatterns = [
     path('edit/<slug:slug>/', views.NoteUpdate.as_view(), name='edit'),
     path('note/<slug:slug>/', views.NoteDetail.as_view(), name='detail'),
     path('delete/<slug:slug>/', views.NoteDelete.as_view(), name='delete'),
+    path('history/<slug:slug>/', views.NoteHistory.as_view(),
+         name='history'),
+    path('restore/<slug:slug>/<int:number>/', views.NoteRestore.as_view(),
+         name='restore'),
     path('notes/', views.NotesList.as_view(), name='list'),
+    path('notes/bulk/', views.NoteBulkAction.as_view(), name='bulk'),
+    path('search/', views.NoteSearch.as_view(), name='search'),
     path('done/', views.NoteSuccess.as_view(), name='success'),
 ]
@@ -1,9 +1,21 @@
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.urls import reverse_lazy
+from django.shortcuts import get_object_or_404
+from django.db.models.functions import Length
+from django.http import (
+    Http404, HttpResponseBadRequest, HttpResponseRedirect
+)
+from django.template.loader import render_to_string
+from django.utils.http import urlencode
+from django.utils.safestring import mark_safe
+from django.urls import reverse, reverse_lazy
 from django.views import generic
 
-from .forms import NoteForm
-from .models import Note
+from .cache import get_note_body
+from .forms import NoteBulkForm, NoteForm
+from .models import MAX_ID, Note, Tag
+from .revisions import get_revision
+from .search import SearchResults
 
 
 class Home(generic.TemplateView):
@@ -50,10 +62,156 @@ class NoteDelete(NoteBase, generic.DeleteView):
 
 
 class NotesList(NoteBase, generic.ListView):
-    """Список всех заметок пользователя."""
+    """Список всех заметок пользователя.
+
+    Страницы идут по ключу (author, id): ?after=<id> последней
+    показанной заметки, поэтому дальние страницы не дороже первой.
+    Текст заметки списку не нужен и из базы не читается.
+    С ?tag=<метка> страницы идут по индексу связей (tag, note).
+    """
     template_name = 'notes/list.html'
 
+    def get_queryset(self):
+        per_page = settings.NOTES_COUNT_ON_LIST_PAGE
+        self.archived = self.request.GET.get('archived') == '1'
+        notes = super().get_queryset().filter(
+            is_archived=self.archived
+        ).only('id', 'slug', 'title')
+        after = self.request.GET.get('after')
+        if after:
+            # Не isdigit(): тот пропускает «²», а int() на нём падает.
+            try:
+                after = int(after)
+            except ValueError:
+                raise Http404('Некорректный курсор.')
+            if not 0 <= after <= MAX_ID:
+                raise Http404('Некорректный курсор.')
+        # Ключ страниц — id заметки или тот же id в связях с меткой:
+        # тогда SQLite идёт по индексу (tag, note), а не по всем
+        # заметкам автора. Условия должны быть в одном filter(),
+        # иначе Django добавит в запрос второй JOIN со связями.
+        key, lookups = 'id', {}
+        self.tag = None
+        tag_name = self.request.GET.get('tag')
+        if tag_name:
+            self.tag = get_object_or_404(
+                Tag, author=self.request.user, name=tag_name
+            )
+            key, lookups = 'notetag__note_id', {'notetag__tag': self.tag}
+        if after:
+            lookups[f'{key}__gt'] = after
+        notes = notes.filter(**lookups).order_by(key)
+        notes = list(notes[:per_page + 1])
+        self.next_after = None
+        if len(notes) > per_page:
+            notes = notes[:per_page]
+            self.next_after = notes[-1].id
+        return notes
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['next_after'] = self.next_after
+        context['archived'] = self.archived
+        context['tag'] = self.tag
+        # Число заметок хранится в метке, COUNT по связям не нужен.
+        context['tags'] = Tag.objects.filter(
+            author=self.request.user, note_count__gt=0
+        )
+        context['bulk_form'] = NoteBulkForm(initial={
+            'archived': self.archived,
+            'listed_tag': self.tag.name if self.tag else '',
+        })
+        return context
+
+
+class NoteBulkAction(NoteBase, generic.FormView):
+    """
+    Массовое действие над заметками из списка.
+
+    Удаление или перенос в архив выполняются одним QuerySet.delete()
+    или update() по заметкам пользователя.
+    """
+    form_class = NoteBulkForm
+    http_method_names = ['post']
+
+    def form_valid(self, form):
+        form.apply(self.get_queryset(), self.request.user)
+        params = {}
+        if form.cleaned_data['archived']:
+            params['archived'] = 1
+        if form.cleaned_data['listed_tag']:
+            params['tag'] = form.cleaned_data['listed_tag']
+        url = reverse('notes:list')
+        if params:
+            url += '?' + urlencode(params)
+        return HttpResponseRedirect(url)
+
+    def form_invalid(self, form):
+        return HttpResponseBadRequest(form.errors.as_text())
+
+
+class NoteSearch(LoginRequiredMixin, generic.ListView):
+    """Полнотекстовый поиск по заметкам пользователя."""
+    template_name = 'notes/search.html'
+
+    def get_queryset(self):
+        return SearchResults(self.request.GET.get('q', ''),
+                             self.request.user.pk)
+
+    def get_paginate_by(self, queryset):
+        return settings.NOTES_SEARCH_PAGE_SIZE
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.request.GET.get('q', '')
+        return context
+
 
 class NoteDetail(NoteBase, generic.DetailView):
-    """Заметка подробно."""
+    """Заметка подробно.
+
+    Тело заметки берётся из кэша по ключу (автор, slug), поэтому
+    при попадании в кэш база не читается.
+    """
     template_name = 'notes/detail.html'
+
+    def get(self, request, *args, **kwargs):
+        slug = self.kwargs['slug']
+        body = get_note_body(request.user.pk, slug, self.render_body)
+        # Тело отрендерено нашим же шаблоном, экранирование уже сделано.
+        return self.render_to_response(
+            {'slug': slug, 'body': mark_safe(body)}
+        )
+
+    def render_body(self):
+        self.object = self.get_object()
+        return render_to_string(
+            'notes/includes/note_body.html', {'note': self.object}
+        )
+
+
+class NoteHistory(NoteBase, generic.DetailView):
+    """История версий заметки."""
+    template_name = 'notes/history.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['revisions'] = self.object.revisions.defer('data').annotate(
+            size=Length('data')
+        )
+        return context
+
+
+class NoteRestore(NoteBase, generic.detail.SingleObjectMixin, generic.View):
+    """Восстановление заметки из версии; восстановление — тоже версия."""
+
+    def post(self, request, *args, **kwargs):
+        note = self.get_object()
+        revision = get_revision(note, self.kwargs['number'])
+        if revision is None:
+            raise Http404('Нет такой версии.')
+        note.title, note.text = revision
+        note.save()
+        return HttpResponseRedirect(
+            reverse('notes:history', args=[note.slug])
+        )
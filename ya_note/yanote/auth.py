@@ -0,0 +1,40 @@
+"""
+Пользователь сессии из кэша.
+
+Подключается через AUTHENTICATION_BACKENDS, см. settings_sessions.
+"""
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+
+KEY_PREFIX = 'yanote.auth.user:'
+
+
+def get_user_cache():
+    return caches[settings.SESSION_CACHE_ALIAS]
+
+
+def forget_user(user_id):
+    get_user_cache().delete(KEY_PREFIX + str(user_id))
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    ModelBackend, который берёт пользователя запроса из кэша.
+
+    В пределах запроса пользователь и так загружается один раз
+    (AuthenticationMiddleware запоминает его в request), кэш убирает
+    запрос к auth_user между запросами. Запись сбрасывается при
+    сохранении и удалении пользователя (notes.signals), поэтому смена
+    пароля сразу закрывает остальные сессии.
+    """
+
+    def get_user(self, user_id):
+        user_cache = get_user_cache()
+        key = KEY_PREFIX + str(user_id)
+        user = user_cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                user_cache.set(key, user, settings.AUTH_USER_CACHE_TIMEOUT)
+        return user
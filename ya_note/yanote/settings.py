@@ -56,9 +56,15 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Тестовая база в файле, а не в памяти: в общей памяти SQLite
+        # параллельные писатели получают «database table is locked».
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
 
+# PRAGMA для каждого нового соединения с SQLite, см. settings_production.
+SQLITE_PRAGMAS = {}
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -69,6 +75,11 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Сколько секунд изменения сессии могут жить только в кэше и сколько
+# секунд пользователь сессии хранится в кэше, см. settings_sessions.
+SESSION_DB_WRITE_INTERVAL = 60
+AUTH_USER_CACHE_TIMEOUT = 5 * 60
+
 
 LANGUAGE_CODE = 'ru'
 
@@ -87,3 +98,13 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('notes:home')
+
+NOTES_COUNT_ON_LIST_PAGE = 100
+NOTES_SEARCH_PAGE_SIZE = 20
+
+# Алиас из CACHES для тел заметок и время их жизни в секундах.
+NOTES_DETAIL_CACHE = 'default'
+NOTES_DETAIL_CACHE_TIMEOUT = 60 * 60
+
+# Полный текст заметки сохраняется в каждой такой по счёту версии.
+NOTES_REVISION_SNAPSHOT_EVERY = 20
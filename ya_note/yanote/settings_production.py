@@ -0,0 +1,35 @@
+"""
+Профиль базы для продакшена: SQLite под параллельной записью.
+
+Включается через DJANGO_SETTINGS_MODULE или --settings.
+"""
+from .settings import *  # noqa: F401, F403
+from .settings import DATABASES
+
+DEBUG = False
+
+# Новый словарь, а не правка импортированного: иначе профиль менял бы
+# DATABASES модуля settings у всех, кто его уже импортировал.
+DATABASES = {'default': {
+    **DATABASES['default'],
+    # atomic() сразу берёт блокировку записи, см. yanote/sqlite/base.py.
+    'ENGINE': 'yanote.sqlite',
+    # Соединение живёт между запросами, и PRAGMA не выполняются
+    # на каждый запрос заново.
+    'CONN_MAX_AGE': 600,
+}}
+
+# Выполняются на каждом новом соединении (signals.tune_sqlite).
+SQLITE_PRAGMAS = {
+    # Читатели не блокируют писателя и наоборот.
+    'journal_mode': 'WAL',
+    # В WAL данные не теряются при падении процесса, fsync только
+    # на контрольных точках.
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    # Отрицательное значение — размер в КиБ, здесь 64 МиБ.
+    'cache_size': -64 * 1024,
+    'temp_store': 'MEMORY',
+    # Сколько миллисекунд ждать занятую базу до «database is locked».
+    'busy_timeout': 5000,
+}
@@ -0,0 +1,19 @@
+"""
+Профиль сессий: сессия и пользователь из кэша, без запросов к базе.
+
+Включается через DJANGO_SETTINGS_MODULE или --settings. Кэш должен быть
+общим для всех процессов сервера (memcached, Redis): locmem годится
+только для одного процесса.
+"""
+from .settings import *  # noqa: F401, F403
+
+# Кэш с отложенной записью в базу, см. yanote/sessions.py. Без хранилища
+# вовсе — 'django.contrib.sessions.backends.signed_cookies': сессия
+# в подписанной cookie, но выход не отзывает её уже выданные копии.
+SESSION_ENGINE = 'yanote.sessions'
+
+AUTHENTICATION_BACKENDS = [
+    'yanote.auth.CachedModelBackend',
+    # Для сессий, открытых до включения профиля.
+    'django.contrib.auth.backends.ModelBackend',
+]
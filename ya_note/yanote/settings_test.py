@@ -0,0 +1,9 @@
+"""
+Профиль для тестов: pytest.ini и run_tests.sh подключают его сами.
+
+PBKDF2 намеренно медленный и съедает большую часть времени тестов
+на create_user и login, поэтому пароли здесь хэшируются MD5.
+"""
+from .settings import *  # noqa: F401, F403
+
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
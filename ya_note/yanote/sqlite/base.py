@@ -0,0 +1,16 @@
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    SQLite, где transaction.atomic() начинается с BEGIN IMMEDIATE.
+
+    Транзакция после обычного BEGIN сначала читает, а при первой записи
+    повышает блокировку. Если другой писатель успел раньше, SQLite сразу
+    отвечает «database is locked» — busy_timeout здесь не ждёт, иначе
+    была бы взаимоблокировка. BEGIN IMMEDIATE берёт блокировку записи
+    в начале транзакции и ждёт её до busy_timeout.
+    """
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute('BEGIN IMMEDIATE')